@@ -1,14 +1,25 @@
-import itertools
 import math
-
-from typing import Tuple, List
+from itertools import accumulate
+from typing import Iterator, List, Optional
 
 import numpy.random
 from networkx import DiGraph
 from tqdm import trange
 
-from .cvrp_solver import CVRPSolver, Truck, CVRPDefinition
-from .util import route_len
+from .compact_route import CompactRoute
+from .cvrp_matrix import CVRPMatrix
+from .cvrp_solver import CVRPSolver, Truck, CVRPDefinition, SolutionUpdate
+from .giant_tour_ant_colony import GiantTourAntColony, ParallelGiantTourAntColony, SparseGiantTourAntColony
+from .local_search import LocalSearch
+from .matrix_ant_colony import AntColony, MatrixAntColony, BatchedAntColony
+from .parallel_ant_colony import ParallelAntColony
+from .profiling import SolverProfile, create_profile
+from .sampling import UniformBlock, roulette_pick
+from .savings_cvrp_solver import savings_route
+from .sparse_matrix import SparseCVRPMatrix
+from .route_optimizer import HeldKarpRouteOptimizer
+from .stopping import SolveResult, StoppingRule
+from .telemetry import IterationTrace
 
 DEPOT = 'Depot'
 
@@ -17,8 +28,20 @@ class AntColonyCVRPSolver(CVRPSolver):
 	def __init__(
 			self, iterations: int, ants_per_customer = 1, init_pheromone = 1.0, pheromone_factor = 1.0,
 			evaporation_factor = 0.1, alpha = 1.0, beta = 2.3, rand_chance = 0.1, candidate_fraction = 1.0,
-			permute_routes = False, show_progress = False
+			permute_routes = False, show_progress = False, backend = 'graph', workers = 1,
+			local_search: LocalSearch = None, time_limit: Optional[float] = None,
+			stagnation_limit: Optional[int] = None, target_gap: Optional[float] = None, profile = False,
+			trace = False, savings_seed = 0.0, giant_tour = False, compact = False, cancel_event = None
 	):
+		if backend not in ('graph', 'matrix', 'batched'):
+			raise ValueError(f'Unknown ACO backend: {backend}')
+		if workers > 1 and backend == 'graph':
+			raise ValueError('Parallel ant construction requires the matrix or batched backend')
+		if giant_tour and backend != 'batched':
+			raise ValueError('Giant tour construction requires the batched backend')
+		if compact and backend == 'graph':
+			raise ValueError('Compact storage requires the matrix or batched backend')
+
 		self.ants_per_customer = ants_per_customer
 		self.init_pheromone = init_pheromone
 		self.pheromone_factor = pheromone_factor
@@ -30,11 +53,27 @@ class AntColonyCVRPSolver(CVRPSolver):
 		self.candidate_fraction = candidate_fraction
 		self.permute_routes = permute_routes
 		self.show_progress = show_progress
-		self.candidate_set_map = {}
+		self.backend = backend
+		self.workers = workers
+		self.local_search = local_search
+		self.time_limit = time_limit
+		self.stagnation_limit = stagnation_limit
+		self.target_gap = target_gap
+		self.profile = profile
+		self.trace = trace
+		self.savings_seed = savings_seed
+		self.giant_tour = giant_tour
+		self.compact = compact
+		self.cancel_event = cancel_event
 		self.rng = None
+		self.uniforms: Optional[UniformBlock] = None
+		self.last_result: Optional[SolveResult] = None
+		self.last_profile: SolverProfile = create_profile(False)
+		self.last_trace: Optional[IterationTrace] = None
 
 	def set_rng(self, rng: numpy.random.Generator):
 		self.rng = rng
+		self.uniforms = UniformBlock(rng)
 
 	def get_info(self) -> str:
 		mods = ''
@@ -42,73 +81,200 @@ class AntColonyCVRPSolver(CVRPSolver):
 			mods += ' M1'
 		if self.candidate_fraction < 1:
 			mods += ' M2'
+		if self.local_search:
+			mods += f' {self.local_search.get_info()}'
+		if self.savings_seed:
+			mods += ' CW'
+		if self.giant_tour:
+			mods += ' GT'
+		if self.compact:
+			mods += ' F32'
 
 		ants_count = '' if self.ants_per_customer == 1 else f' m={self.ants_per_customer}n'
 
-		return f'ACO{mods}{ants_count} {self.iterations} it'
+		stops = ''
+		if self.time_limit is not None:
+			stops += f' {self.time_limit:g} s'
+		if self.stagnation_limit is not None:
+			stops += f' K={self.stagnation_limit}'
+		if self.target_gap is not None:
+			stops += f' gap={self.target_gap:g}'
 
-	def solve_cvrp(self, problem: CVRPDefinition) -> DiGraph:
-		g_work = problem.graph.copy()
-		self.__prepare_candidate_lists__(g_work)
+		return f'ACO{mods}{ants_count} {self.iterations} it{stops}'
 
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
 		if not self.rng:
-			self.rng = numpy.random.default_rng()
+			self.set_rng(numpy.random.default_rng())
+
+		if self.backend != 'graph':
+			yield from self.__solve_matrix__(problem)
+			return
+
+		matrix = problem.get_matrix()
+		if isinstance(matrix, SparseCVRPMatrix):
+			raise ValueError('Sparse problems require the batched backend with giant tour construction')
+		g_work = problem.graph.copy()
+		candidate_lists = self.__prepare_candidate_lists__(matrix)
+		route_optimizer = HeldKarpRouteOptimizer(matrix) if self.permute_routes else None
+		profile = self.last_profile = create_profile(self.profile)
+		trace = self.last_trace = IterationTrace(self.iterations) if self.trace else None
+		neighbors = matrix.neighbor_mask()
 
 		for e in g_work.edges(data = True):
 			e[2]['pheromone'] = self.init_pheromone
+		if self.savings_seed:
+			for src, dest in savings_route(problem).edges():
+				g_work.edges[matrix.nodes[src], matrix.nodes[dest]]['pheromone'] += self.seed_pheromone()
 
 		best_route = None
 		best_route_len = math.inf
 
+		stopping = self.create_stopping_rule()
+		stopping.start(problem)
+		stop_reason = None
 		iter_range = self.__make_progress_range__(problem) if self.show_progress else range(self.iterations)
 		for _ in iter_range:
 			routes = []
 
-			for ant in range(self.ants_per_customer * len(g_work.nodes)):
-				route = self.__find_ant_route__(g_work, problem.truck_capacity, problem.truck_route_limit)
-
-				rlen = route_len(route)
-				if rlen < best_route_len:
+			with profile.phase('construct'):
+				for ant in range(self.ants_per_customer * len(g_work.nodes)):
+					route = self.__find_ant_route__(
+						g_work, matrix, candidate_lists, route_optimizer, problem.truck_capacity,
+						problem.truck_route_limit
+					)
+					routes.append(route)
+
+			if self.local_search:
+				with profile.phase('local_search'):
+					iteration_best = min(range(len(routes)), key = lambda i: routes[i].length)
+					routes[iteration_best] = self.local_search.improve(
+						routes[iteration_best], matrix, problem.truck_capacity, problem.truck_route_limit
+					)
+
+			improved = False
+			for route in routes:
+				if route.length < best_route_len:
 					best_route = route
-					best_route_len = rlen
-
-				routes.append((route, rlen))
-
-			self.__update_pheromone__(g_work, routes)
-
-		return best_route
-
-	def __find_ant_route__(self, graph: DiGraph, truck_capacity: float, truck_route_limit: float):
-		solution = DiGraph()
-		solution.add_nodes_from(graph.nodes(data = True))
+					best_route_len = route.length
+					improved = True
+
+			with profile.phase('pheromone'):
+				self.__update_pheromone__(g_work, matrix, routes)
+
+			if route_optimizer:
+				profile.record('permutation_evaluations', route_optimizer.evaluations)
+			if trace:
+				trace.record(routes, best_route_len, self.__pheromone_matrix__(g_work, matrix), neighbors)
+
+			stop_reason = stopping.update(best_route_len)
+			if improved:
+				yield SolutionUpdate(problem, stopping.iteration, stopping.elapsed, best_route_len, best_route)
+			if stop_reason:
+				break
+
+		self.last_result = stopping.result(stop_reason)
+
+	def seed_pheromone(self) -> float:
+		"""Pheromone added to the edges of the Clarke-Wright solution when trails are seeded with it."""
+		return self.savings_seed * self.init_pheromone
+
+	def create_stopping_rule(self) -> StoppingRule:
+		return StoppingRule(
+			self.iterations, self.time_limit, self.stagnation_limit, self.target_gap, cancel_event = self.cancel_event
+		)
+
+	def check_problem(self, problem: CVRPDefinition):
+		"""Raises ValueError for problems the configured colonies cannot solve."""
+		if isinstance(problem.get_matrix(), SparseCVRPMatrix):
+			if not self.giant_tour or self.workers > 1:
+				raise ValueError('Sparse problems require single process giant tour construction')
+			if self.candidate_fraction < 1:
+				raise ValueError('Sparse problems use the neighbour lists of their matrix as candidate lists')
+
+	def create_colony(self, problem: CVRPDefinition, rng: numpy.random.Generator) -> AntColony:
+		if self.backend == 'graph':
+			raise ValueError('Ant colonies are only available with the matrix or batched backend')
+
+		self.check_problem(problem)
+		if isinstance(problem.get_matrix(), SparseCVRPMatrix):
+			return SparseGiantTourAntColony(self, problem, rng)
+
+		if self.giant_tour:
+			if self.workers > 1:
+				return ParallelGiantTourAntColony(GiantTourAntColony, self, problem, rng, self.workers)
+			return GiantTourAntColony(self, problem, rng)
+
+		colony_type = BatchedAntColony if self.backend == 'batched' else MatrixAntColony
+		if self.workers > 1:
+			return ParallelAntColony(colony_type, self, problem, rng, self.workers)
+		return colony_type(self, problem, rng)
+
+	def __solve_matrix__(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		colony = self.create_colony(problem, self.rng)
+		self.last_trace = colony.trace
+		stopping = self.create_stopping_rule()
+		stopping.start(problem)
+		stop_reason = None
+		try:
+			iter_range = self.__make_progress_range__(problem) if self.show_progress else range(self.iterations)
+			for _ in iter_range:
+				previous_best_len = colony.best_route_len
+				colony.iterate()
+				stop_reason = stopping.update(colony.best_route_len)
+				if colony.best_route_len < previous_best_len:
+					yield SolutionUpdate(
+						problem, stopping.iteration, stopping.elapsed, colony.best_route_len, colony.best_route
+					)
+				if stop_reason:
+					break
+		finally:
+			colony.close()
+			self.last_profile = colony.collect_profile()
+
+		self.last_result = stopping.result(stop_reason)
+
+	def __find_ant_route__(
+			self, graph: DiGraph, matrix: CVRPMatrix, candidate_lists: Optional[dict],
+			route_optimizer: Optional[HeldKarpRouteOptimizer], truck_capacity: float, truck_route_limit: float
+	) -> CompactRoute:
+		tour = [matrix.node_index[DEPOT]]
+		rlen = 0
 		visited_nodes = {DEPOT}
 		truck = Truck(graph, truck_capacity, truck_route_limit)
 
-		while len(visited_nodes) < len(list(graph.nodes)):
-			next_node = self.__next_node__(graph, truck.current_node, forbidden = visited_nodes)
+		while len(visited_nodes) < len(graph.nodes):
+			next_node = self.__next_node__(graph, candidate_lists, truck.current_node, forbidden = visited_nodes)
 			move = truck.make_move(next_node)
-			solution.add_edge(move.src, move.dest, cost = move.cost)
+			tour.append(matrix.node_index[move.dest])
+			rlen += move.cost
 			visited_nodes.add(move.dest)
 
 		if truck.current_node != DEPOT:
-			solution.add_edge(truck.current_node, DEPOT, cost = graph.edges[truck.current_node, DEPOT]['cost'])
-
-		if self.permute_routes:
-			return self.__permute_partial_routes__(solution, graph)
-
-		return solution
-
-	def __next_node__(self, graph: DiGraph, current_node, forbidden: set):
-		potential_targets = list(self.candidate_set_map[current_node] - forbidden)
+			tour.append(matrix.node_index[DEPOT])
+			rlen += graph.edges[truck.current_node, DEPOT]['cost']
+
+		self.last_profile.count('ant_steps', len(tour) - 1)
+		route = CompactRoute(tour, rlen)
+		if route_optimizer:
+			with self.last_profile.phase('permute'):
+				return route_optimizer.optimize_solution(route)
+
+		return route
+
+	def __next_node__(self, graph: DiGraph, candidate_lists: Optional[dict], current_node, forbidden: set):
+		potential_targets = []
+		if candidate_lists is not None:
+			potential_targets = [v for v in candidate_lists[current_node] if v not in forbidden]
+			if not potential_targets:
+				self.last_profile.count('candidate_fallbacks')
 		if not potential_targets:
-			potential_targets = list(set(graph.neighbors(current_node)) - forbidden)
+			potential_targets = [v for v in graph.neighbors(current_node) if v not in forbidden]
 
 		node_weights = [self.__ant_decision_factor__(graph, current_node, v) for v in potential_targets]
-		choice = self.rng.random()
+		choice = self.uniforms.next()
 
 		if choice < self.rand_chance:
-			w = numpy.array(node_weights) / sum(node_weights)
-			return self.rng.choice(potential_targets, p = w)
+			return potential_targets[roulette_pick(list(accumulate(node_weights)), self.uniforms.next())]
 		else:
 			max_index = numpy.argmax(node_weights)
 			v = potential_targets[max_index]
@@ -119,55 +285,24 @@ class AntColonyCVRPSolver(CVRPSolver):
 		e_cost = 1 if e['cost'] == 0 else e['cost']
 		return e['pheromone'] ** self.alpha * (1 / e_cost) ** self.beta
 
-	def __update_pheromone__(self, graph: DiGraph, routes: List[Tuple[DiGraph, float]]):
-		for route, rlen in routes:
-			for e in route.edges:
-				prev_pheromone = graph.edges[e[0], e[1]]['pheromone']
-				delta = (1 - self.evaporation_factor) * prev_pheromone + self.pheromone_factor / rlen
-				graph.edges[e[0], e[1]]['pheromone'] = delta
-
-	def __prepare_candidate_lists__(self, graph: DiGraph):
-		candidates_count = round(len(graph.nodes) * self.candidate_fraction)
-		for v in graph.nodes:
-			if self.candidate_fraction == 1:
-				self.candidate_set_map[v] = set(graph.neighbors(v))
-			else:
-				sorted_neighbors = sorted(
-					graph.neighbors(v), key = lambda u: math.inf if u == DEPOT else graph.edges[v, u]['cost']
-				)
-				self.candidate_set_map[v] = set(sorted_neighbors[0:candidates_count])
-
-	def __permute_partial_routes__(self, solution: DiGraph, graph: DiGraph) -> DiGraph:
-		permuted_solution = DiGraph()
-		permuted_solution.add_nodes_from(solution.nodes(data = True))
-
-		for c in solution.neighbors(DEPOT):
-			route = []
-			while c != DEPOT:
-				route.append(c)
-				c = list(solution.neighbors(c))[0]
-
-			if len(route) < 6:
-				best_len = math.inf
-				for route_perm in itertools.permutations(route):
-					rlen = 0
-					for i in range(1, len(route_perm)):
-						rlen += graph.edges[route_perm[i - 1], route_perm[i]]['cost']
-					rlen += graph.edges[DEPOT, route_perm[0]]['cost']
-					rlen += graph.edges[route_perm[-1], DEPOT]['cost']
-					if rlen < best_len:
-						route = list(route_perm)
-						best_len = rlen
-
-			for i in range(1, len(route)):
-				src = route[i - 1]
-				dest = route[i]
-				permuted_solution.add_edge(src, dest, cost = graph.edges[src, dest]['cost'])
-
-			permuted_solution.add_edge(DEPOT, route[0], cost = graph.edges[DEPOT, route[0]]['cost'])
-			permuted_solution.add_edge(route[-1], DEPOT, cost = graph.edges[route[-1], DEPOT]['cost'])
-
-		return permuted_solution
+	def __update_pheromone__(self, graph: DiGraph, matrix: CVRPMatrix, routes: List[CompactRoute]):
+		for route in routes:
+			for src, dest in route.edges():
+				e = graph.edges[matrix.nodes[src], matrix.nodes[dest]]
+				e['pheromone'] = (1 - self.evaporation_factor) * e['pheromone'] + self.pheromone_factor / route.length
+
+	def __pheromone_matrix__(self, graph: DiGraph, matrix: CVRPMatrix) -> numpy.ndarray:
+		pheromone = numpy.zeros(matrix.cost.shape)
+		for u, v, pheromone_value in graph.edges(data = 'pheromone'):
+			pheromone[matrix.node_index[u], matrix.node_index[v]] = pheromone_value
+		return pheromone
+
+	def __prepare_candidate_lists__(self, matrix: CVRPMatrix) -> Optional[dict]:
+		if self.candidate_fraction == 1:
+			return None
+
+		nearest = matrix.nearest_neighbors(round(len(matrix.nodes) * self.candidate_fraction))
+		return { matrix.nodes[v]: [matrix.nodes[u] for u in row] for v, row in enumerate(nearest.tolist()) }
 
 	def __make_progress_range__(self, problem: CVRPDefinition):
 		return trange(self.iterations, desc = f'{self.get_info()} | {problem.instance_name}')
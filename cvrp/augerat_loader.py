@@ -1,31 +1,41 @@
-import sys
+import math
 from pathlib import Path
+from typing import Optional
 
-from .augerat_dataset import AugeratDataSet
+from .cvrp_matrix import CVRPMatrix, DEPOT
 from .cvrp_solver import CVRPDefinition
-
-
-def load_augerat_example(instance_name: str) -> CVRPDefinition:
-	sys.path.append('../')
-	dataset = AugeratDataSet(path = Path('examples/'), instance_name = instance_name)
-
-	cvrp_graph = dataset.G
-	source = cvrp_graph.nodes['Source']
-
-	cvrp_graph.add_node('Depot', x = source['x'], y = source['y'], demand = 0)
-
-	for v in cvrp_graph.neighbors('Source'):
-		cvrp_graph.add_edge('Depot', v, cost = cvrp_graph.edges['Source', v]['cost'])
-
-	for v in cvrp_graph.nodes:
-		if v != 'Sink' and 'Sink' in cvrp_graph.neighbors(v):
-			cvrp_graph.add_edge(v, 'Depot', cost = cvrp_graph.edges[v, 'Sink']['cost'])
-
-	cvrp_graph.remove_node('Source')
-	cvrp_graph.remove_node('Sink')
-
+from .sparse_matrix import SparseCVRPMatrix
+from .tsplib_reader import read_tsplib, euclidean_costs
+
+
+def load_augerat_example(
+		instance_name: str, path: Path = Path('examples/'), neighbors_count: Optional[int] = None
+) -> CVRPDefinition:
+	"""
+	Loads a TSPLIB instance with a dense cost matrix, or with a SparseCVRPMatrix keeping neighbors_count nearest
+	neighbours per node when it is given, which large instances need to fit in memory.
+	"""
+	instance = read_tsplib(Path(path) / instance_name)
+
+	customers = [i for i in range(len(instance.demand)) if i != instance.depot_index]
+	order = [instance.depot_index] + customers
+	coords = instance.coords[order]
+
+	# Customers keep the labels of the former graph loader: their TSPLIB id minus one.
+	nodes = [DEPOT] + (instance.node_ids[customers] - 1).tolist()
+	if neighbors_count is not None:
+		matrix = SparseCVRPMatrix(nodes, coords, instance.demand[order], neighbors_count)
+	else:
+		matrix = CVRPMatrix(
+			nodes = nodes, cost = euclidean_costs(coords), demand = instance.demand[order], coords = coords
+		)
+
+	truck_route_limit = math.inf
 	min_truck_count = int(instance_name.rstrip('.vrp').split('-')[2][1:])
+	if instance.best_known_solution is not None:
+		truck_route_limit = 3 * instance.best_known_solution / min_truck_count
+
 	return CVRPDefinition(
-		instance_name, graph = cvrp_graph, truck_capacity = dataset.max_load,
-		truck_route_limit = 3 * dataset.best_known_solution / min_truck_count
+		instance_name, graph = None, truck_capacity = instance.capacity, truck_route_limit = truck_route_limit,
+		matrix = matrix, best_known_solution = instance.best_known_solution
 	)
@@ -0,0 +1,199 @@
+import json
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+
+import numpy
+from pandas import DataFrame
+from tqdm import tqdm
+
+from .aco_cvrp_solver import AntColonyCVRPSolver
+from .compact_route import CompactRoute
+from .cvrp_solver import CVRPSolver, final_update
+from .greedy_cvrp_solver import GreedyCVRPSolver
+from .instance_cache import load_cached_example
+from .island_aco_cvrp_solver import IslandAntColonyCVRPSolver
+from .local_search import LocalSearch
+from .local_search_cvrp_solver import LocalSearchCVRPSolver
+from .max_min_aco_cvrp_solver import MaxMinAntColonyCVRPSolver
+from .savings_cvrp_solver import SavingsCVRPSolver
+from .solution_validator import validate_routes
+
+
+def create_solver(spec: dict) -> CVRPSolver:
+	"""
+	Builds a solver from its declarative description: {'type': 'aco', 'iterations': 1000, ...}, with type one of
+	aco, mmas, greedy, savings, local_search or island. Wrapping solvers describe the wrapped one under 'solver',
+	e.g. {'type': 'local_search', 'solver': {'type': 'greedy'}}.
+	"""
+	kwargs = { key: value for key, value in spec.items() if key not in ('type', 'samples') }
+	solver_type = spec['type']
+
+	if solver_type in ('aco', 'mmas'):
+		if 'local_search' in kwargs:
+			kwargs['local_search'] = LocalSearch(**kwargs['local_search'])
+		solver_class = AntColonyCVRPSolver if solver_type == 'aco' else MaxMinAntColonyCVRPSolver
+		return solver_class(**kwargs)
+	if solver_type == 'greedy':
+		return GreedyCVRPSolver(**kwargs)
+	if solver_type == 'savings':
+		return SavingsCVRPSolver(**kwargs)
+	if solver_type == 'local_search':
+		return LocalSearchCVRPSolver(create_solver(kwargs.pop('solver')), LocalSearch(**kwargs))
+	if solver_type == 'island':
+		return IslandAntColonyCVRPSolver(create_solver(kwargs.pop('solver')), **kwargs)
+
+	raise ValueError(f'Unknown solver type: {solver_type}')
+
+
+class BenchmarkConfig:
+	"""
+	Declarative benchmark sweep: every solver runs on every instance. Samples of an instance use random streams
+	spawned by sample index from seed and the instance name, shared by all solvers, so results are reproducible
+	whatever the order of the instances and solvers are compared on the same streams. A solver spec can lower its
+	own sample count, e.g. for deterministic solvers.
+	"""
+
+	def __init__(self, instances: List[str], solvers: List[dict], samples: int, seed: int, path = 'examples/'):
+		self.instances = instances
+		self.solvers = solvers
+		self.samples = samples
+		self.seed = seed
+		self.path = path
+
+	@staticmethod
+	def from_file(path: Path) -> 'BenchmarkConfig':
+		with open(path) as file:
+			return BenchmarkConfig(**json.load(file))
+
+	def cases(self) -> Iterator['BenchmarkCase']:
+		for instance in self.instances:
+			instance_seed = numpy.random.SeedSequence((self.seed, zlib.crc32(instance.encode())))
+			sample_seeds = instance_seed.spawn(self.samples)
+			for solver_index, spec in enumerate(self.solvers):
+				for sample in range(min(spec.get('samples', self.samples), self.samples)):
+					yield BenchmarkCase(self.path, instance, solver_index, spec, sample, sample_seeds[sample])
+
+	def select_results(self, results: List[dict]) -> List[dict]:
+		"""Results of the cases of this sweep, leaving out those of other seeds or former solver lists."""
+		case_ids = { case.case_id for case in self.cases() }
+		return [result for result in results if result['case_id'] in case_ids]
+
+
+class BenchmarkCase:
+	def __init__(
+			self, path: str, instance: str, solver_index: int, solver_spec: dict, sample: int,
+			seed: numpy.random.SeedSequence
+	):
+		self.path = path
+		self.instance = instance
+		self.solver_index = solver_index
+		self.solver_spec = solver_spec
+		self.sample = sample
+		self.seed = seed
+
+	@property
+	def case_id(self) -> str:
+		# The whole seed and solver spec take part in the id, so editing the config does not reuse stale results.
+		seed = f'{self.seed.entropy}:{self.seed.spawn_key}'
+		spec = json.dumps(self.solver_spec, sort_keys = True)
+		return f'{seed}/{self.instance}/{self.solver_index}/{spec}/{self.sample}'
+
+
+def run_case(case: BenchmarkCase) -> dict:
+	problem = load_cached_example(case.instance, Path(case.path))
+	solver = create_solver(case.solver_spec)
+	if hasattr(solver, 'set_rng'):
+		solver.set_rng(numpy.random.default_rng(case.seed))
+
+	start_time = time.perf_counter()
+	last_update = final_update(solver.solve_iter(problem))
+	runtime = time.perf_counter() - start_time
+
+	last_result = getattr(solver, 'last_result', None)
+	iterations = last_result.iterations if last_result else last_update.iteration
+	route = last_update.route
+	if not isinstance(route, CompactRoute):
+		route = CompactRoute.from_graph(route, problem.get_matrix())
+	valid = bool(validate_routes(problem, [route]).valid[0])
+
+	best_len = float(last_update.best_len)
+	best_known = problem.best_known_solution
+	return {
+		'case_id': case.case_id,
+		'instance': case.instance,
+		'customers_count': len(problem.get_matrix().nodes) - 1,
+		'truck_capacity': problem.truck_capacity,
+		'truck_route_limit': problem.truck_route_limit,
+		'solver_index': case.solver_index,
+		'solver_desc': solver.get_info(),
+		'sample': case.sample,
+		'rlen': best_len,
+		'valid': valid,
+		'runtime': runtime,
+		'iterations': iterations,
+		'iterations_per_second': iterations / runtime if runtime > 0 else None,
+		'best_known_solution': best_known,
+		'gap': best_len / best_known - 1 if best_known else None,
+	}
+
+
+def read_results(results_path: Path) -> List[dict]:
+	"""Reads the results file, ignoring a last line cut off by an interrupted run."""
+	results = []
+	if not Path(results_path).exists():
+		return results
+
+	with open(results_path) as file:
+		for line in file:
+			try:
+				results.append(json.loads(line))
+			except json.JSONDecodeError:
+				continue
+	return results
+
+
+def run_benchmark(
+		config: BenchmarkConfig, results_path: Path, processes: Optional[int] = None, show_progress = True
+) -> List[dict]:
+	"""
+	Runs the cases that have no result in results_path yet and appends each result as soon as it is ready, so an
+	interrupted sweep resumes where it stopped. Returns the results of the cases of config only. Cases run in a
+	process pool whose workers may start processes of their own, as island and parallel ant colony solvers do.
+	"""
+	results = read_results(results_path)
+	done: Set[str] = { result['case_id'] for result in results }
+	cases = [case for case in config.cases() if case.case_id not in done]
+
+	Path(results_path).parent.mkdir(parents = True, exist_ok = True)
+	with open(results_path, mode = 'at') as file, ProcessPoolExecutor(processes) as executor:
+		if file.tell() and not Path(results_path).read_bytes().endswith(b'\n'):
+			file.write('\n')
+
+		case_results = as_completed([executor.submit(run_case, case) for case in cases])
+		if show_progress:
+			case_results = tqdm(case_results, total = len(cases))
+
+		for case_result in case_results:
+			result = case_result.result()
+			file.write(json.dumps(result) + '\n')
+			file.flush()
+			results.append(result)
+
+	return config.select_results(results)
+
+
+def summarize(results: List[dict]) -> DataFrame:
+	df = DataFrame(results)
+	summary = df.groupby(
+		['instance', 'customers_count', 'solver_index', 'solver_desc', 'truck_capacity', 'truck_route_limit']
+	).agg(
+		rlen_avg = ('rlen', 'mean'), rlen_std_dev = ('rlen', 'std'), rlen_min = ('rlen', 'min'),
+		gap_avg = ('gap', 'mean'), runtime_avg = ('runtime', 'mean'),
+		iterations_per_second = ('iterations_per_second', 'mean'), valid = ('valid', 'all'),
+		samples = ('rlen', 'count')
+	).reset_index()
+	summary['rlen_std_dev'] = summary['rlen_std_dev'].fillna(0.0)
+	return summary
@@ -0,0 +1,56 @@
+from typing import List
+
+import numpy
+from networkx import DiGraph
+
+from .cvrp_matrix import CVRPMatrix, DEPOT, DEPOT_INDEX
+
+
+class CompactRoute:
+	"""Giant tour of node indices with depot separators, e.g. [0, 3, 1, 0, 2, 0], and its cached length."""
+
+	__slots__ = ('tour', 'length')
+
+	def __init__(self, tour, length: float):
+		self.tour = numpy.asarray(tour, dtype = numpy.int32)
+		self.length = length
+
+	@staticmethod
+	def from_routes(routes: List, length: float) -> 'CompactRoute':
+		tour = [DEPOT_INDEX]
+		for route in routes:
+			tour += list(route)
+			tour.append(DEPOT_INDEX)
+		return CompactRoute(tour, length)
+
+	@staticmethod
+	def from_graph(solution: DiGraph, matrix: CVRPMatrix) -> 'CompactRoute':
+		routes = []
+		length = 0
+		for c in solution.neighbors(DEPOT):
+			length += solution.edges[DEPOT, c]['cost']
+			route = []
+			while c != DEPOT:
+				route.append(matrix.node_index[c])
+				next_c = next(iter(solution.neighbors(c)))
+				length += solution.edges[c, next_c]['cost']
+				c = next_c
+			routes.append(route)
+		return CompactRoute.from_routes(routes, length)
+
+	def routes(self) -> List[numpy.ndarray]:
+		depots = numpy.flatnonzero(self.tour == DEPOT_INDEX)
+		return [self.tour[start + 1:end] for start, end in zip(depots[:-1], depots[1:]) if end > start + 1]
+
+	def edges(self):
+		return zip(self.tour[:-1].tolist(), self.tour[1:].tolist())
+
+	def to_graph(self, matrix: CVRPMatrix, graph: DiGraph) -> DiGraph:
+		solution = DiGraph()
+		solution.add_nodes_from(graph.nodes(data = True))
+
+		for src, dest in self.edges():
+			if src != dest:
+				solution.add_edge(matrix.nodes[src], matrix.nodes[dest], cost = float(matrix.cost[src, dest]))
+
+		return solution
@@ -0,0 +1,100 @@
+from typing import Optional
+
+import numpy
+from networkx import DiGraph
+
+DEPOT = 'Depot'
+DEPOT_INDEX = 0
+
+
+class CVRPMatrix:
+	"""Dense, integer-indexed view of a CVRP graph. Index 0 is always the depot."""
+
+	def __init__(self, nodes: list, cost: numpy.ndarray, demand: numpy.ndarray, coords: Optional[numpy.ndarray] = None):
+		self.nodes = nodes
+		self.node_index = { v: i for i, v in enumerate(nodes) }
+		self.cost = cost
+		self.demand = demand
+		self.coords = coords
+		self.nearest_neighbors_cache = { }
+		self.symmetric: Optional[bool] = None
+		self.cost_row_lists: Optional[list] = None
+		self.compact_cost_matrix: Optional[numpy.ndarray] = None
+
+	@staticmethod
+	def from_graph(graph: DiGraph) -> 'CVRPMatrix':
+		nodes = [DEPOT] + [v for v in graph.nodes if v != DEPOT]
+		node_index = { v: i for i, v in enumerate(nodes) }
+
+		cost = numpy.full((len(nodes), len(nodes)), numpy.inf)
+		numpy.fill_diagonal(cost, 0)
+		for u, v, c in graph.edges(data = 'cost'):
+			cost[node_index[u], node_index[v]] = c
+
+		demand = numpy.array([graph.nodes[v]['demand'] for v in nodes], dtype = float)
+		coords = None
+		if all('x' in graph.nodes[v] and 'y' in graph.nodes[v] for v in nodes):
+			coords = numpy.array([(graph.nodes[v]['x'], graph.nodes[v]['y']) for v in nodes], dtype = float)
+
+		return CVRPMatrix(nodes, cost, demand, coords)
+
+	def to_graph(self) -> DiGraph:
+		# Customers first and the depot last, the node order the Augerat loader has always produced.
+		order = list(range(1, len(self.nodes))) + [DEPOT_INDEX]
+
+		graph = DiGraph()
+		for i in order:
+			attributes = { 'demand': self.demand[i].item() }
+			if self.coords is not None:
+				attributes['x'], attributes['y'] = self.coords[i].tolist()
+			graph.add_node(self.nodes[i], **attributes)
+
+		cost_rows = self.cost_rows()
+		graph.add_edges_from(
+			(self.nodes[u], self.nodes[v], { 'cost': cost_rows[u][v] })
+			for u in order for v in order if u != v and cost_rows[u][v] != numpy.inf
+		)
+		return graph
+
+	def neighbor_mask(self) -> numpy.ndarray:
+		mask = numpy.isfinite(self.cost)
+		numpy.fill_diagonal(mask, False)
+		return mask
+
+	def cost_rows(self) -> list:
+		# Plain Python rows, much faster than ndarray indexing for scalar lookups in pure-Python loops.
+		if self.cost_row_lists is None:
+			self.cost_row_lists = self.cost.tolist()
+		return self.cost_row_lists
+
+	def compact_cost(self) -> numpy.ndarray:
+		# Rounded costs such as those of TSPLIB instances fit in int32, others and missing edges need float32.
+		if self.compact_cost_matrix is None:
+			cost = numpy.asarray(self.cost)
+			if numpy.isfinite(cost).all() and numpy.array_equal(cost, numpy.rint(cost)) and \
+					numpy.abs(cost).max() <= numpy.iinfo(numpy.int32).max:
+				self.compact_cost_matrix = cost.astype(numpy.int32)
+			else:
+				self.compact_cost_matrix = cost.astype(numpy.float32)
+		return self.compact_cost_matrix
+
+	def is_symmetric(self) -> bool:
+		if self.symmetric is None:
+			self.symmetric = bool(numpy.array_equal(self.cost, self.cost.T))
+		return self.symmetric
+
+	def nearest_neighbors(self, count: int) -> numpy.ndarray:
+		# Row v lists the count closest neighbours of v, the depot coming last. Rows with fewer neighbours are
+		# padded with v itself, which ants never pick as it is always visited by the time they stand on it.
+		count = min(count, len(self.nodes) - 1)
+		if count not in self.nearest_neighbors_cache:
+			neighbors = self.neighbor_mask()
+			sort_keys = numpy.where(neighbors, self.cost, numpy.nan)
+			sort_keys[:, DEPOT_INDEX] = numpy.where(neighbors[:, DEPOT_INDEX], numpy.inf, numpy.nan)
+
+			nearest = numpy.argsort(sort_keys, axis = 1, kind = 'stable')[:, :count]
+			missing = numpy.isnan(numpy.take_along_axis(sort_keys, nearest, axis = 1))
+			nearest[missing] = numpy.nonzero(missing)[0]
+			self.nearest_neighbors_cache[count] = nearest.astype(numpy.int32)
+
+		return self.nearest_neighbors_cache[count]
@@ -1,22 +1,87 @@
 import math
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Optional, Union
 
 from networkx import DiGraph
 
+from .compact_route import CompactRoute
+from .cvrp_matrix import CVRPMatrix
+
 DEPOT = 'Depot'
 
 
 class CVRPDefinition:
-	def __init__(self, instance_name: str, graph: DiGraph, truck_capacity: float, truck_route_limit = math.inf):
-		self.graph = graph
+	"""A problem is given by its graph, its compiled matrix or both; the missing one is built on first use."""
+
+	def __init__(
+			self, instance_name: str, graph: Optional[DiGraph], truck_capacity: float, truck_route_limit = math.inf,
+			matrix: CVRPMatrix = None, best_known_solution: Optional[float] = None
+	):
+		if graph is None and matrix is None:
+			raise ValueError('A CVRP definition needs a graph or a matrix')
+
 		self.truck_capacity = truck_capacity
 		self.truck_route_limit = truck_route_limit
 		self.instance_name = instance_name
+		self.best_known_solution = best_known_solution
+		self.matrix = matrix
+		self.__graph = graph
+
+	@property
+	def graph(self) -> DiGraph:
+		if self.__graph is None:
+			self.__graph = self.matrix.to_graph()
+		return self.__graph
+
+	def get_matrix(self) -> CVRPMatrix:
+		if self.matrix is None:
+			self.matrix = CVRPMatrix.from_graph(self.__graph)
+		return self.matrix
+
+
+class SolutionUpdate:
+	"""
+	Improvement reported by CVRPSolver.solve_iter; unpacks as (iteration, elapsed, best_len, best_route). The route
+	graph is only built when best_route is read, so consumers that track lengths do not pay for it.
+	"""
+
+	def __init__(
+			self, problem: CVRPDefinition, iteration: int, elapsed: float, best_len: float,
+			route: Union[DiGraph, CompactRoute]
+	):
+		self.problem = problem
+		self.iteration = iteration
+		self.elapsed = elapsed
+		self.best_len = best_len
+		self.route = route
+
+	@property
+	def best_route(self) -> DiGraph:
+		if isinstance(self.route, CompactRoute):
+			self.route = self.route.to_graph(self.problem.get_matrix(), self.problem.graph)
+		return self.route
+
+	def __iter__(self):
+		return iter((self.iteration, self.elapsed, self.best_len, self.best_route))
+
+
+def final_update(updates: Iterable[SolutionUpdate]) -> SolutionUpdate:
+	"""Last update of a solve_iter run; raises CVRPException when the run reported no solution at all."""
+	last_update = None
+	for update in updates:
+		last_update = update
+	if last_update is None:
+		raise CVRPException('Solver finished without any solution, e.g. after zero iterations')
+	return last_update
 
 
 class CVRPSolver(ABC):
-	@abstractmethod
 	def solve_cvrp(self, problem: CVRPDefinition) -> DiGraph:
+		return final_update(self.solve_iter(problem)).best_route
+
+	@abstractmethod
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		"""Yields the incumbent solution every time it improves; the last update holds the final solution."""
 		pass
 
 	@abstractmethod
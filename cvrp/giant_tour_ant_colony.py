@@ -0,0 +1,167 @@
+from typing import List, TYPE_CHECKING
+
+import numpy
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import DEPOT_INDEX
+from .cvrp_solver import CVRPDefinition
+from .matrix_ant_colony import BatchedAntColony
+from .parallel_ant_colony import ParallelAntColony
+from .split import split_giant_tour
+
+if TYPE_CHECKING:
+	from .aco_cvrp_solver import AntColonyCVRPSolver
+
+
+class GiantTourPheromone:
+	"""
+	Pheromone update of the route-first, cluster-second colonies. Ants decide the order of the customers only, so
+	trails are laid on the giant tour of a solution, its customers in route order, instead of on its depot edges.
+	"""
+
+	def __deposit_pheromone__(self, routes: List[CompactRoute]):
+		giant_tours = [
+			CompactRoute(
+				numpy.concatenate([[DEPOT_INDEX], route.tour[route.tour != DEPOT_INDEX], [DEPOT_INDEX]]), route.length
+			)
+			for route in routes
+		]
+		super().__deposit_pheromone__(giant_tours)
+
+
+class GiantTourAntColony(GiantTourPheromone, BatchedAntColony):
+	"""
+	Ants build a tour through all customers without regard to the trucks, which an optimal Split then cuts into
+	routes respecting the truck capacity and route limit.
+	"""
+
+	def __construct_routes__(self) -> List[CompactRoute]:
+		decision = self.decision_table()
+
+		visited = numpy.zeros((self.ants_count, self.nodes_count), dtype = bool)
+		visited[:, DEPOT_INDEX] = True
+		current = numpy.zeros(self.ants_count, dtype = int)
+		giant_tours = numpy.empty((self.ants_count, self.nodes_count - 1), dtype = int)
+
+		for step in range(self.nodes_count - 1):
+			self.profile.count('ant_steps', self.ants_count)
+			current = self.__next_nodes__(current, visited, decision)
+			visited[numpy.arange(self.ants_count), current] = True
+			giant_tours[:, step] = current
+
+		routes = [
+			split_giant_tour(
+				giant_tour, self.cost_rows, self.demand, self.truck_capacity, self.truck_route_limit
+			)
+			for giant_tour in giant_tours.tolist()
+		]
+		if self.route_optimizer:
+			return self.__optimize_routes__(routes)
+
+		return routes
+
+
+class ParallelGiantTourAntColony(GiantTourPheromone, ParallelAntColony):
+	pass
+
+
+class SparseGiantTourAntColony(BatchedAntColony):
+	"""
+	Giant tour colony for a SparseCVRPMatrix. Trails and heuristic are only kept for the candidate edges, an
+	(n, k) array whose slot s of row u stands for the edge to the s-th nearest neighbour of u, and deposits on
+	other edges are dropped. Ants are built in batches of ANT_BATCH_SIZE so the visited masks stay O(n) per ant;
+	an ant whose candidates are all visited moves to the nearest unvisited customer instead.
+	"""
+
+	ANT_BATCH_SIZE = 256
+
+	def __init__(self, solver: 'AntColonyCVRPSolver', problem: CVRPDefinition, rng: numpy.random.Generator):
+		if solver.trace:
+			raise ValueError('Iteration traces are not available for sparse problems')
+		super().__init__(solver, problem, rng)
+
+	def __init_trails__(self, dtype):
+		self.candidate_index = self.matrix.neighbors
+		candidate_costs = self.matrix.neighbor_costs(self.candidate_index.shape[1])
+		self.heuristic = numpy.reciprocal(numpy.where(candidate_costs == 0, 1, candidate_costs).astype(dtype)) ** \
+			self.solver.beta
+		self.pheromone = numpy.full(self.candidate_index.shape, self.solver.init_pheromone, dtype = dtype)
+
+	def __seed_trails__(self, route: CompactRoute, amount: float):
+		rows, slots, found = self.__trail_slots__(route.tour[:-1], route.tour[1:])
+		self.pheromone[rows[found], slots[found]] += amount
+
+	def __construct_routes__(self) -> List[CompactRoute]:
+		decision = self.decision_table()
+
+		giant_tours = []
+		for start in range(0, self.ants_count, self.ANT_BATCH_SIZE):
+			ants_count = min(self.ANT_BATCH_SIZE, self.ants_count - start)
+			ants = numpy.arange(ants_count)
+			visited = numpy.zeros((ants_count, self.nodes_count), dtype = bool)
+			visited[:, DEPOT_INDEX] = True
+			current = numpy.zeros(ants_count, dtype = int)
+			batch_tours = numpy.empty((ants_count, self.nodes_count - 1), dtype = int)
+
+			for step in range(self.nodes_count - 1):
+				self.profile.count('ant_steps', ants_count)
+				current = self.__next_candidates__(current, visited, decision)
+				visited[ants, current] = True
+				batch_tours[:, step] = current
+			giant_tours += batch_tours.tolist()
+
+		routes = [
+			split_giant_tour(
+				giant_tour, self.cost_rows, self.demand, self.truck_capacity, self.truck_route_limit
+			)
+			for giant_tour in giant_tours
+		]
+		if self.route_optimizer:
+			return self.__optimize_routes__(routes)
+
+		return routes
+
+	def __next_candidates__(
+			self, current: numpy.ndarray, visited: numpy.ndarray, decision: numpy.ndarray
+	) -> numpy.ndarray:
+		next_nodes = numpy.empty(len(current), dtype = int)
+
+		targets = self.candidate_index[current]
+		allowed = ~numpy.take_along_axis(visited, targets, axis = 1)
+		exhausted = ~allowed.any(axis = 1)
+
+		found = numpy.flatnonzero(~exhausted)
+		targets = targets[found]
+		node_weights = numpy.where(allowed[found], decision[current[found]], 0)
+		next_nodes[found] = targets[numpy.arange(len(found)), self.__pick__(node_weights, allowed[found])]
+
+		if exhausted.any():
+			self.profile.count('candidate_fallbacks', exhausted.sum())
+			stranded = numpy.flatnonzero(exhausted)
+			deltas = self.matrix.coords[current[stranded], numpy.newaxis, :] - self.matrix.coords[numpy.newaxis, :, :]
+			distances = numpy.einsum('ijk,ijk->ij', deltas, deltas)
+			distances[visited[stranded]] = numpy.inf
+			next_nodes[stranded] = numpy.argmin(distances, axis = 1)
+
+		return next_nodes
+
+	def __trail_slots__(self, src: numpy.ndarray, dest: numpy.ndarray):
+		"""Candidate slots of the edges src -> dest; found is False for edges which are not candidates."""
+		matches = self.candidate_index[src] == numpy.asarray(dest)[:, numpy.newaxis]
+		return numpy.asarray(src), numpy.argmax(matches, axis = 1), matches.any(axis = 1)
+
+	def __deposit_pheromone__(self, routes: List[CompactRoute]):
+		if not routes:
+			return
+
+		# Trails are laid on the giant tour order, as in GiantTourPheromone.
+		giant_tours = [numpy.concatenate([[DEPOT_INDEX], route.tour[route.tour != DEPOT_INDEX]]) for route in routes]
+		src = numpy.concatenate([tour[:-1] for tour in giant_tours])
+		dest = numpy.concatenate([tour[1:] for tour in giant_tours])
+		amounts = numpy.repeat(
+			[self.solver.pheromone_factor / route.length for route in routes], [len(tour) - 1 for tour in giant_tours]
+		)
+
+		rows, slots, found = self.__trail_slots__(src, dest)
+		numpy.add.at(self.pheromone, (rows[found], slots[found]), amounts[found] / self.pheromone_scale)
+		self.__invalidate_decision__(rows[found])
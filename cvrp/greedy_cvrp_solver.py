@@ -1,14 +1,26 @@
+import time
+from typing import Iterator
+
 from networkx import DiGraph
 
-from .cvrp_solver import CVRPSolver, Truck, CVRPDefinition
-from .util import closest_neighbor
+from .cvrp_solver import CVRPSolver, Truck, CVRPDefinition, SolutionUpdate
+from .sparse_matrix import SparseCVRPMatrix
+from .util import closest_neighbor, route_len
 
 
 class GreedyCVRPSolver(CVRPSolver):
 	def get_info(self) -> str:
 		return 'Greedy'
 
-	def solve_cvrp(self, problem: CVRPDefinition) -> DiGraph:
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		if isinstance(problem.matrix, SparseCVRPMatrix):
+			# The graph of a sparse problem only has nearest neighbour edges, which run out before the customers do.
+			raise ValueError('Greedy construction does not support sparse problems')
+		start_time = time.perf_counter()
+		solution = self.__build_route__(problem)
+		yield SolutionUpdate(problem, 1, time.perf_counter() - start_time, route_len(solution), solution)
+
+	def __build_route__(self, problem: CVRPDefinition) -> DiGraph:
 		depot = 'Depot'
 
 		solution = DiGraph()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy
+
+from .augerat_loader import load_augerat_example
+from .cvrp_matrix import CVRPMatrix
+from .cvrp_solver import CVRPDefinition
+
+DEFAULT_CACHE_DIR = Path('.cache/instances')
+CACHE_FORMAT_VERSION = b'2'
+
+
+class CachedCVRPDefinition(CVRPDefinition):
+	"""Problem backed by a memory-mapped cache entry. It pickles as the entry path, so worker processes map the
+	same pages instead of receiving a copy of the matrices."""
+
+	def __init__(self, entry: Path, **kwargs):
+		super().__init__(**kwargs)
+		self.cache_entry = entry
+
+	def __reduce__(self):
+		return open_cached_instance, (self.cache_entry,)
+
+
+def load_cached_example(
+		instance_name: str, path: Path = Path('examples/'), cache_dir: Path = DEFAULT_CACHE_DIR
+) -> CachedCVRPDefinition:
+	source = Path(path) / instance_name
+	key = hashlib.sha256(CACHE_FORMAT_VERSION + source.read_bytes()).hexdigest()[:32]
+	entry = Path(cache_dir).resolve() / key
+
+	if not (entry / 'meta.json').exists():
+		_compile_instance(instance_name, path, entry)
+
+	return open_cached_instance(entry)
+
+
+def open_cached_instance(entry: Path) -> CachedCVRPDefinition:
+	with open(entry / 'meta.json') as file:
+		meta = json.load(file)
+
+	coords = numpy.load(entry / 'coords.npy', mmap_mode = 'r') if meta['has_coords'] else None
+	matrix = CVRPMatrix(
+		nodes = meta['nodes'], cost = numpy.load(entry / 'cost.npy', mmap_mode = 'r'),
+		demand = numpy.load(entry / 'demand.npy', mmap_mode = 'r'), coords = coords
+	)
+
+	return CachedCVRPDefinition(
+		entry, instance_name = meta['instance_name'], graph = None, truck_capacity = meta['truck_capacity'],
+		truck_route_limit = meta['truck_route_limit'], matrix = matrix,
+		best_known_solution = meta['best_known_solution']
+	)
+
+
+def _compile_instance(instance_name: str, path: Path, entry: Path):
+	problem = load_augerat_example(instance_name, path)
+	matrix = problem.get_matrix()
+
+	staging = entry.with_name(f'{entry.name}.{os.getpid()}.tmp')
+	staging.mkdir(parents = True, exist_ok = True)
+	numpy.save(staging / 'cost.npy', matrix.cost.astype(numpy.float32))
+	numpy.save(staging / 'demand.npy', matrix.demand)
+	if matrix.coords is not None:
+		numpy.save(staging / 'coords.npy', matrix.coords)
+
+	with open(staging / 'meta.json', mode = 'wt') as file:
+		json.dump({
+			'instance_name': problem.instance_name,
+			'nodes': matrix.nodes,
+			'truck_capacity': problem.truck_capacity,
+			'truck_route_limit': problem.truck_route_limit,
+			'best_known_solution': problem.best_known_solution,
+			'has_coords': matrix.coords is not None,
+		}, file)
+
+	try:
+		staging.rename(entry)
+	except OSError:
+		# Another process compiled the same instance first.
+		shutil.rmtree(staging)
@@ -0,0 +1,139 @@
+import math
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from typing import Iterator, List, Optional
+
+import numpy
+from tqdm import tqdm
+
+from .aco_cvrp_solver import AntColonyCVRPSolver
+from .cvrp_solver import CVRPSolver, CVRPDefinition, SolutionUpdate
+from .stopping import SolveResult
+
+
+def _island_worker(
+		connection: Connection, solver: AntColonyCVRPSolver, problem: CVRPDefinition, rng: numpy.random.Generator
+):
+	colony = solver.create_colony(problem, rng)
+	try:
+		while True:
+			message = connection.recv()
+			if message is None:
+				break
+
+			iterations, migrants = message
+			colony.deposit(migrants)
+			for _ in range(iterations):
+				colony.iterate()
+
+			connection.send(colony.best_route)
+	finally:
+		colony.close()
+
+
+class IslandReport:
+	def __init__(self, islands: int):
+		self.iterations: List[int] = []
+		self.island_best_lens: List[List[float]] = [[] for _ in range(islands)]
+		self.best_len = math.inf
+		self.best_island: int = None
+
+	def convergence(self) -> numpy.ndarray:
+		return numpy.array(self.island_best_lens)
+
+
+class IslandAntColonyCVRPSolver(CVRPSolver):
+	"""
+	Runs independent ant colonies in separate processes. Every migration_interval iterations the colonies exchange
+	their best routes, which are deposited into the pheromone trails of all other colonies. The stopping criteria of
+	the colony solver are checked at these migrations, so a run may exceed them by up to one migration interval.
+	"""
+
+	def __init__(
+			self, colony_solver: AntColonyCVRPSolver, islands = 4, migration_interval = 100, show_progress = False
+	):
+		if colony_solver.backend == 'graph':
+			raise ValueError('Island colonies require the matrix or batched backend')
+		if colony_solver.workers > 1:
+			raise ValueError('Island colonies cannot use parallel ant construction')
+
+		self.colony_solver = colony_solver
+		self.islands = islands
+		self.migration_interval = migration_interval
+		self.show_progress = show_progress
+		self.report: IslandReport = None
+		self.rng = None
+		self.last_result: Optional[SolveResult] = None
+
+	def set_rng(self, rng: numpy.random.Generator):
+		self.rng = rng
+
+	def get_info(self) -> str:
+		return f'{self.colony_solver.get_info()} I{self.islands}x{self.migration_interval}'
+
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		if not self.rng:
+			self.rng = numpy.random.default_rng()
+
+		self.report = IslandReport(self.islands)
+		connections = []
+		processes = []
+		for island_rng in self.rng.spawn(self.islands):
+			connection, worker_connection = multiprocessing.Pipe()
+			process = multiprocessing.Process(
+				target = _island_worker, daemon = True,
+				args = (worker_connection, self.colony_solver, problem, island_rng)
+			)
+			process.start()
+			connections.append(connection)
+			processes.append(process)
+
+		try:
+			yield from self.__run_islands__(problem, connections)
+		finally:
+			for connection in connections:
+				connection.send(None)
+			for process in processes:
+				process.join()
+
+	def __run_islands__(self, problem: CVRPDefinition, connections: List[Connection]) -> Iterator[SolutionUpdate]:
+		start_time = time.perf_counter()
+		island_routes = [None] * self.islands
+		iterations = self.colony_solver.iterations
+		stopping = self.colony_solver.create_stopping_rule()
+		stopping.start(problem)
+		stop_reason = None
+		progress = tqdm(total = iterations, desc = f'{self.get_info()} | {problem.instance_name}') \
+			if self.show_progress else None
+
+		done = 0
+		while done < iterations:
+			epoch = min(self.migration_interval, iterations - done)
+			for i, connection in enumerate(connections):
+				migrants = [route for j, route in enumerate(island_routes) if j != i and route is not None]
+				connection.send((epoch, migrants))
+
+			island_routes = [connection.recv() for connection in connections]
+			done += epoch
+			self.report.iterations.append(done)
+
+			best_route = None
+			for i, route in enumerate(island_routes):
+				self.report.island_best_lens[i].append(route.length)
+				if route.length < self.report.best_len:
+					best_route = route
+					self.report.best_len = route.length
+					self.report.best_island = i
+
+			stop_reason = stopping.update(self.report.best_len, epoch)
+			if progress:
+				progress.update(epoch)
+			if best_route:
+				yield SolutionUpdate(problem, done, time.perf_counter() - start_time, best_route.length, best_route)
+			if stop_reason:
+				break
+
+		if progress:
+			progress.close()
+		self.last_result = stopping.result(stop_reason)
@@ -0,0 +1,224 @@
+from typing import List
+
+from networkx import DiGraph
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import CVRPMatrix, DEPOT_INDEX
+from .cvrp_solver import CVRPDefinition
+
+IMPROVEMENT_EPSILON = 1e-9
+
+
+class LocalSearch:
+	"""
+	First-improvement local search with intra-route 2-opt and Or-opt and inter-route relocate and swap moves.
+	Every move is evaluated in O(1) from the cost deltas of the edges it replaces. Inter-route moves only try to
+	place a customer next to one of its nearest neighbours, which keeps a pass linear in the number of customers.
+	"""
+
+	def __init__(
+			self, neighbors_count = 10, max_passes = 20, two_opt = True, or_opt = True, relocate = True, swap = True
+	):
+		self.neighbors_count = neighbors_count
+		self.max_passes = max_passes
+		self.two_opt = two_opt
+		self.or_opt = or_opt
+		self.relocate = relocate
+		self.swap = swap
+
+	def get_info(self) -> str:
+		return 'LS'
+
+	def improve_solution(self, problem: CVRPDefinition, solution: DiGraph) -> DiGraph:
+		matrix = problem.get_matrix()
+		route = self.improve(
+			CompactRoute.from_graph(solution, matrix), matrix, problem.truck_capacity, problem.truck_route_limit
+		)
+		return route.to_graph(matrix, problem.graph)
+
+	def improve(
+			self, route: CompactRoute, matrix: CVRPMatrix, truck_capacity: float, truck_route_limit: float
+	) -> CompactRoute:
+		search = _LocalSearchRun(self, matrix, truck_capacity, truck_route_limit, route)
+		search.run()
+		return search.result()
+
+
+class _LocalSearchRun:
+	def __init__(
+			self, config: LocalSearch, matrix: CVRPMatrix, truck_capacity: float, truck_route_limit: float,
+			route: CompactRoute
+	):
+		self.config = config
+		self.cost = matrix.cost_rows()
+		self.demand = matrix.demand.tolist()
+		self.neighbors = matrix.nearest_neighbors(config.neighbors_count).tolist()
+		self.symmetric = matrix.is_symmetric()
+		self.truck_capacity = truck_capacity
+		self.truck_route_limit = truck_route_limit
+
+		self.routes: List[List[int]] = [r.tolist() for r in route.routes()]
+		self.loads = [0.0] * len(self.routes)
+		self.lengths = [0.0] * len(self.routes)
+		self.route_of = [-1] * len(self.demand)
+		self.position = [-1] * len(self.demand)
+		for r in range(len(self.routes)):
+			self.__update_route__(r)
+
+	def run(self):
+		for _ in range(self.config.max_passes):
+			improved = False
+
+			for r in range(len(self.routes)):
+				while self.config.two_opt and self.symmetric and self.__two_opt__(r):
+					improved = True
+				while self.config.or_opt and self.__or_opt__(r):
+					improved = True
+
+			for u in range(len(self.demand)):
+				if self.route_of[u] < 0:
+					continue
+				if self.config.relocate and self.__relocate__(u):
+					improved = True
+				elif self.config.swap and self.__swap__(u):
+					improved = True
+
+			if not improved:
+				break
+
+	def result(self) -> CompactRoute:
+		routes = [route for route in self.routes if route]
+		lengths = [rlen for route, rlen in zip(self.routes, self.lengths) if route]
+		return CompactRoute.from_routes(routes, sum(lengths))
+
+	def __two_opt__(self, r: int) -> bool:
+		route = self.routes[r]
+		c = self.cost
+
+		for i in range(len(route) - 1):
+			a = route[i - 1] if i else DEPOT_INDEX
+			b = route[i]
+			for j in range(i + 1, len(route)):
+				x = route[j]
+				y = route[j + 1] if j + 1 < len(route) else DEPOT_INDEX
+				if c[a][x] + c[b][y] - c[a][b] - c[x][y] < -IMPROVEMENT_EPSILON:
+					route[i:j + 1] = route[i:j + 1][::-1]
+					self.__update_route__(r)
+					return True
+
+		return False
+
+	def __or_opt__(self, r: int) -> bool:
+		route = self.routes[r]
+		c = self.cost
+
+		for segment_len in (1, 2, 3):
+			for i in range(len(route) - segment_len + 1):
+				segment = route[i:i + segment_len]
+				first, last = segment[0], segment[-1]
+				p = route[i - 1] if i else DEPOT_INDEX
+				s = route[i + segment_len] if i + segment_len < len(route) else DEPOT_INDEX
+				removal = c[p][first] + c[last][s] - c[p][s]
+
+				rest = route[:i] + route[i + segment_len:]
+				for k in range(len(rest) + 1):
+					if k == i:
+						continue
+
+					a = rest[k - 1] if k else DEPOT_INDEX
+					b = rest[k] if k < len(rest) else DEPOT_INDEX
+					if c[a][first] + c[last][b] - c[a][b] - removal < -IMPROVEMENT_EPSILON:
+						route[:] = rest[:k] + segment + rest[k:]
+						self.__update_route__(r)
+						return True
+					if segment_len > 1 and self.symmetric and \
+							c[a][last] + c[first][b] - c[a][b] - removal < -IMPROVEMENT_EPSILON:
+						route[:] = rest[:k] + segment[::-1] + rest[k:]
+						self.__update_route__(r)
+						return True
+
+		return False
+
+	def __relocate__(self, u: int) -> bool:
+		c = self.cost
+		ru, i = self.route_of[u], self.position[u]
+		p, s = self.__neighbors_on_route__(ru, i)
+		removal = c[p][u] + c[u][s] - c[p][s]
+		if self.lengths[ru] - removal > self.truck_route_limit:
+			return False
+
+		for v in self.neighbors[u]:
+			rv = self.route_of[v]
+			if rv < 0 or rv == ru or self.loads[rv] + self.demand[u] > self.truck_capacity:
+				continue
+
+			j = self.position[v]
+			pv, sv = self.__neighbors_on_route__(rv, j)
+			for a, b, k in ((v, sv, j + 1), (pv, v, j)):
+				insertion = c[a][u] + c[u][b] - c[a][b]
+				if insertion - removal < -IMPROVEMENT_EPSILON and \
+						self.lengths[rv] + insertion <= self.truck_route_limit:
+					del self.routes[ru][i]
+					self.routes[rv].insert(k, u)
+					self.__update_route__(ru)
+					self.__update_route__(rv)
+					return True
+
+		return False
+
+	def __swap__(self, u: int) -> bool:
+		c = self.cost
+		ru, i = self.route_of[u], self.position[u]
+		pu, su = self.__neighbors_on_route__(ru, i)
+
+		for v in self.neighbors[u]:
+			rv = self.route_of[v]
+			if rv < 0 or rv == ru:
+				continue
+
+			j = self.position[v]
+			route_v = self.routes[rv]
+			for w_pos in (j - 1, j, j + 1):
+				if not 0 <= w_pos < len(route_v):
+					continue
+
+				w = route_v[w_pos]
+				load_u = self.loads[ru] - self.demand[u] + self.demand[w]
+				load_w = self.loads[rv] - self.demand[w] + self.demand[u]
+				if load_u > self.truck_capacity or load_w > self.truck_capacity:
+					continue
+
+				pw, sw = self.__neighbors_on_route__(rv, w_pos)
+				delta_u = c[pu][w] + c[w][su] - c[pu][u] - c[u][su]
+				delta_w = c[pw][u] + c[u][sw] - c[pw][w] - c[w][sw]
+				if delta_u + delta_w < -IMPROVEMENT_EPSILON and \
+						self.lengths[ru] + delta_u <= self.truck_route_limit and \
+						self.lengths[rv] + delta_w <= self.truck_route_limit:
+					self.routes[ru][i] = w
+					route_v[w_pos] = u
+					self.__update_route__(ru)
+					self.__update_route__(rv)
+					return True
+
+		return False
+
+	def __neighbors_on_route__(self, r: int, i: int):
+		route = self.routes[r]
+		p = route[i - 1] if i else DEPOT_INDEX
+		s = route[i + 1] if i + 1 < len(route) else DEPOT_INDEX
+		return p, s
+
+	def __update_route__(self, r: int):
+		route = self.routes[r]
+		c = self.cost
+
+		rlen = 0
+		prev = DEPOT_INDEX
+		for i, v in enumerate(route):
+			self.route_of[v] = r
+			self.position[v] = i
+			rlen += c[prev][v]
+			prev = v
+
+		self.lengths[r] = rlen + c[prev][DEPOT_INDEX] if route else 0
+		self.loads[r] = sum(self.demand[v] for v in route)
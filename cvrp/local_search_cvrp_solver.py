@@ -0,0 +1,38 @@
+import time
+from typing import Iterator
+
+import numpy.random
+
+from .cvrp_solver import CVRPSolver, CVRPDefinition, SolutionUpdate
+from .local_search import LocalSearch
+from .util import route_len
+
+
+class LocalSearchCVRPSolver(CVRPSolver):
+	def __init__(self, solver: CVRPSolver, local_search: LocalSearch = None):
+		self.solver = solver
+		self.local_search = local_search or LocalSearch()
+
+	def set_rng(self, rng: numpy.random.Generator):
+		if hasattr(self.solver, 'set_rng'):
+			self.solver.set_rng(rng)
+
+	def get_info(self) -> str:
+		return f'{self.solver.get_info()} + {self.local_search.get_info()}'
+
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		"""Passes on the updates of the wrapped solver and finishes with the locally improved final solution."""
+		start_time = time.perf_counter()
+		last_update = None
+		for update in self.solver.solve_iter(problem):
+			last_update = update
+			yield update
+		if last_update is None:
+			return
+
+		solution = self.local_search.improve_solution(problem, last_update.best_route)
+		solution_len = route_len(solution)
+		if solution_len < last_update.best_len:
+			yield SolutionUpdate(
+				problem, last_update.iteration, time.perf_counter() - start_time, solution_len, solution
+			)
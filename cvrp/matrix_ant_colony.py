@@ -0,0 +1,419 @@
+import math
+from abc import ABC, abstractmethod
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import DEPOT_INDEX
+from .cvrp_solver import CVRPDefinition, CVRPException
+from .profiling import SolverProfile, create_profile
+from .route_optimizer import HeldKarpRouteOptimizer
+from .sampling import UniformBlock, roulette_pick
+from .savings_cvrp_solver import savings_route
+from .telemetry import IterationTrace
+
+if TYPE_CHECKING:
+	from .aco_cvrp_solver import AntColonyCVRPSolver
+
+# Pheromone is stored divided by a global decay scale, which is folded back into the matrix once it gets this small.
+PHEROMONE_RESCALE_THRESHOLD = 1e-30
+# Float32 trails of the compact mode overflow far sooner, so their scale is folded back earlier.
+COMPACT_PHEROMONE_RESCALE_THRESHOLD = 1e-12
+# Draws from a whole row that may land on visited nodes before the ant samples among the unvisited ones only.
+SAMPLING_REJECTIONS = 4
+
+
+class AntColony(ABC):
+	"""Trails, decision table and pheromone update shared by the colonies, which differ in how ants are built."""
+
+	def __init__(self, solver: 'AntColonyCVRPSolver', problem: CVRPDefinition, rng: numpy.random.Generator):
+		self.solver = solver
+		self.rng = rng
+		self.uniforms = UniformBlock(rng)
+		self.matrix = problem.get_matrix()
+		self.truck_capacity = problem.truck_capacity
+		self.truck_route_limit = problem.truck_route_limit
+
+		self.nodes_count = len(self.matrix.nodes)
+		self.ants_count = solver.ants_per_customer * self.nodes_count
+		self.cost_rows = self.matrix.cost_rows()
+		self.demand = self.matrix.demand.tolist()
+
+		# Compact mode keeps int32 costs and float32 trails and heuristic, a quarter to half of the working set.
+		self.__init_trails__(numpy.float32 if solver.compact else float)
+		self.pheromone_scale = 1.0
+		self.rescale_threshold = COMPACT_PHEROMONE_RESCALE_THRESHOLD if solver.compact else PHEROMONE_RESCALE_THRESHOLD
+		if solver.savings_seed:
+			self.__seed_trails__(savings_route(problem), solver.seed_pheromone())
+		self.decision = self.__decision_rows__(slice(None)).astype(self.pheromone.dtype)
+		self.stale_rows = numpy.zeros(len(self.pheromone), dtype = bool)
+		self.route_optimizer = HeldKarpRouteOptimizer(self.matrix) if solver.permute_routes else None
+		self.profile = create_profile(solver.profile)
+		self.trace = IterationTrace(solver.iterations) if solver.trace else None
+
+		self.best_route: CompactRoute = None
+		self.best_route_len = math.inf
+
+	def __init_trails__(self, dtype):
+		"""Sets up the costs, candidate lists, heuristic and initial pheromone of the colony."""
+		self.cost = cost = self.matrix.compact_cost() if self.solver.compact else self.matrix.cost
+		self.neighbors = self.matrix.neighbor_mask()
+		self.candidate_index = None
+		if self.solver.candidate_fraction < 1:
+			candidates_count = round(self.nodes_count * self.solver.candidate_fraction)
+			self.candidate_index = self.matrix.nearest_neighbors(candidates_count)
+		self.heuristic = numpy.reciprocal(numpy.where(cost == 0, 1, cost).astype(dtype)) ** self.solver.beta
+		self.pheromone = numpy.full(cost.shape, self.solver.init_pheromone, dtype = dtype)
+
+	def __seed_trails__(self, route: CompactRoute, amount: float):
+		self.pheromone[route.tour[:-1], route.tour[1:]] += amount
+
+	def iterate(self):
+		with self.profile.phase('construct'):
+			routes = self.__construct_routes__()
+		if self.solver.local_search:
+			with self.profile.phase('local_search'):
+				self.__improve_iteration_best__(routes)
+
+		for route in routes:
+			if route.length < self.best_route_len:
+				self.best_route = route
+				self.best_route_len = route.length
+
+		with self.profile.phase('pheromone'):
+			self.__update_pheromone__(routes)
+
+		if self.trace:
+			self.trace.record(routes, self.best_route_len, self.pheromone_values(), self.neighbors)
+
+	def __improve_iteration_best__(self, routes: List[CompactRoute]):
+		best = min(range(len(routes)), key = lambda i: routes[i].length)
+		routes[best] = self.solver.local_search.improve(
+			routes[best], self.matrix, self.truck_capacity, self.truck_route_limit
+		)
+
+	def deposit(self, routes: List[CompactRoute]):
+		self.__deposit_pheromone__(routes)
+
+	def pheromone_values(self) -> numpy.ndarray:
+		return self.pheromone * self.pheromone_scale
+
+	def decision_table(self) -> numpy.ndarray:
+		"""
+		Decision factors tau ** alpha * eta ** beta of all edges. They only change with the trails, so the table is
+		kept between iterations and only the rows of nodes whose outgoing trails changed since are recomputed.
+		"""
+		if self.stale_rows.any():
+			rows = numpy.flatnonzero(self.stale_rows)
+			self.decision[rows] = self.__decision_rows__(rows)
+			self.__decision_changed__(rows)
+			self.stale_rows[:] = False
+		return self.decision
+
+	def __decision_rows__(self, rows) -> numpy.ndarray:
+		pheromone = self.pheromone[rows]
+		if pheromone.dtype != numpy.float64:
+			# Float32 trails of the compact mode raised to an alpha well above 1 would overflow. Ants only compare the
+			# factors of a row, so each row is taken relative to its largest trail, which keeps them at most eta.
+			row_max = pheromone.max(axis = 1, keepdims = True)
+			pheromone = pheromone / numpy.where(row_max > 0, row_max, 1)
+		return numpy.float_power(pheromone, self.solver.alpha) * self.heuristic[rows]
+
+	def __invalidate_decision__(self, rows = slice(None)):
+		self.stale_rows[rows] = True
+
+	def __decision_changed__(self, rows = slice(None)):
+		"""Called with the rows of the decision table that changed, for colonies that keep data derived from it."""
+		pass
+
+	def close(self):
+		pass
+
+	def collect_profile(self) -> SolverProfile:
+		if self.route_optimizer:
+			self.profile.record('permutation_evaluations', self.route_optimizer.evaluations)
+		return self.profile
+
+	def __optimize_routes__(self, routes: List[CompactRoute]) -> List[CompactRoute]:
+		with self.profile.phase('permute'):
+			return [self.route_optimizer.optimize_solution(route) for route in routes]
+
+	@abstractmethod
+	def __construct_routes__(self) -> List[CompactRoute]:
+		pass
+
+	def __return_to_depot__(self, current: int) -> int:
+		if current == DEPOT_INDEX:
+			raise CVRPException('Invalid problem definition: cannot move to any client from depot')
+		elif not self.neighbors[current, DEPOT_INDEX]:
+			raise CVRPException(
+				f'Invalid problem definition: no route to depot from client {self.matrix.nodes[current]}'
+			)
+		return DEPOT_INDEX
+
+	def __update_pheromone__(self, routes: List[CompactRoute]):
+		self.__evaporate_pheromone__()
+		self.__deposit_pheromone__(routes)
+
+	def __evaporate_pheromone__(self):
+		self.pheromone_scale *= 1 - self.solver.evaporation_factor
+		if self.pheromone_scale < self.rescale_threshold:
+			self.pheromone *= self.pheromone_scale
+			self.pheromone_scale = 1.0
+			self.__invalidate_decision__()
+
+	def __deposit_pheromone__(self, routes: List[CompactRoute]):
+		if not routes:
+			return
+
+		src = numpy.concatenate([route.tour[:-1] for route in routes])
+		dest = numpy.concatenate([route.tour[1:] for route in routes])
+		amounts = numpy.repeat(
+			[self.solver.pheromone_factor / route.length for route in routes], [len(route.tour) - 1 for route in routes]
+		)
+		numpy.add.at(self.pheromone, (src, dest), amounts / self.pheromone_scale)
+		self.__invalidate_decision__(src)
+
+
+class MatrixAntColony(AntColony):
+	"""
+	Builds the route of every ant on its own. Random moves are mostly drawn from cumulative rows of the decision
+	table, which are refreshed along with it.
+	"""
+
+	def __init__(self, solver: 'AntColonyCVRPSolver', problem: CVRPDefinition, rng: numpy.random.Generator):
+		self.cumulative: Optional[numpy.ndarray] = None
+		super().__init__(solver, problem, rng)
+
+	def __decision_changed__(self, rows = slice(None)):
+		if self.cumulative is not None:
+			self.__refresh_cumulative__(rows)
+
+	def __refresh_cumulative__(self, rows = slice(None)):
+		"""
+		Cumulative decision factors of the rows, over the candidate list of each node when there is one. Moves to
+		the node itself and to the depot, which __next_node__ never makes, weigh nothing: the zero cost self-loop
+		would otherwise take most of the weight of its row and almost every draw would be rejected.
+		"""
+		rows = numpy.arange(len(self.decision))[rows]
+		targets = numpy.broadcast_to(numpy.arange(self.decision.shape[1]), (len(rows), self.decision.shape[1]))
+		if self.candidate_index is not None:
+			targets = self.candidate_index[rows]
+		weights = numpy.take_along_axis(self.decision[rows], targets, axis = 1)
+		weights[(targets == rows[:, numpy.newaxis]) | (targets == DEPOT_INDEX)] = 0
+		self.cumulative[rows] = numpy.cumsum(weights, axis = 1)
+
+	def __construct_routes__(self) -> List[CompactRoute]:
+		self.decision_table()
+		routes = [self.__find_ant_route__() for _ in range(self.ants_count)]
+		if self.route_optimizer:
+			return self.__optimize_routes__(routes)
+
+		return routes
+
+	def __find_ant_route__(self) -> CompactRoute:
+		visited = numpy.zeros(self.nodes_count, dtype = bool)
+		visited[DEPOT_INDEX] = True
+		unvisited_count = self.nodes_count - 1
+
+		tour = [DEPOT_INDEX]
+		current = DEPOT_INDEX
+		load = 0
+		route = 0
+		rlen = 0
+
+		while unvisited_count:
+			next_node = self.__next_node__(current, visited)
+			costs = self.cost_rows[current]
+
+			dist_to_target = costs[next_node]
+			dist_to_depot = dist_to_target + self.cost_rows[next_node][DEPOT_INDEX]
+			if load + self.demand[next_node] > self.truck_capacity or route + dist_to_depot > self.truck_route_limit:
+				next_node = self.__return_to_depot__(current)
+				rlen += costs[DEPOT_INDEX]
+				load = 0
+				route = 0
+			else:
+				visited[next_node] = True
+				unvisited_count -= 1
+				load += self.demand[next_node]
+				route += dist_to_target
+				rlen += dist_to_target
+
+			tour.append(next_node)
+			current = next_node
+
+		if current != DEPOT_INDEX:
+			tour.append(DEPOT_INDEX)
+			rlen += self.cost_rows[current][DEPOT_INDEX]
+
+		self.profile.count('ant_steps', len(tour) - 1)
+		return CompactRoute(tour, rlen)
+
+	def __next_node__(self, current: int, visited: numpy.ndarray) -> int:
+		randomized = self.uniforms.next() < self.solver.rand_chance
+		if randomized:
+			next_node = self.__sample_unvisited__(current, visited)
+			if next_node is not None:
+				self.profile.count('sampled_moves')
+				return next_node
+			self.profile.count('sampling_fallbacks')
+
+		potential_targets = ()
+		if self.candidate_index is not None:
+			potential_targets = self.candidate_index[current]
+			potential_targets = potential_targets[~visited[potential_targets]]
+
+		if not len(potential_targets):
+			if self.candidate_index is not None:
+				self.profile.count('candidate_fallbacks')
+			potential_targets = numpy.flatnonzero(self.neighbors[current] & ~visited)
+			if not len(potential_targets):
+				raise CVRPException(f'Invalid problem definition: no route from {self.matrix.nodes[current]}')
+
+		node_weights = self.__ant_decision_factor__(current, potential_targets)
+		if randomized:
+			return potential_targets[roulette_pick(numpy.cumsum(node_weights), self.uniforms.next())]
+		else:
+			return potential_targets[numpy.argmax(node_weights)]
+
+	def __sample_unvisited__(self, current: int, visited: numpy.ndarray) -> Optional[int]:
+		"""
+		Roulette pick from the precomputed cumulative row of the current node, redrawn when it lands on a visited
+		node. Accepted picks follow the distribution over the unvisited nodes, which is then never built. None
+		once SAMPLING_REJECTIONS draws are rejected, which is mostly the case late in a tour.
+		"""
+		if self.cumulative is None:
+			self.cumulative = numpy.empty(
+				self.decision.shape if self.candidate_index is None else self.candidate_index.shape,
+				dtype = self.decision.dtype
+			)
+			self.__refresh_cumulative__()
+
+		cumulative = self.cumulative[current]
+		if not cumulative[-1] > 0:
+			return None
+
+		for _ in range(SAMPLING_REJECTIONS):
+			index = roulette_pick(cumulative, self.uniforms.next())
+			next_node = index if self.candidate_index is None else self.candidate_index.item(current, index)
+			if not visited[next_node]:
+				return next_node
+		return None
+
+	def __ant_decision_factor__(self, u: int, targets: numpy.ndarray) -> numpy.ndarray:
+		# The decay scale multiplies every factor equally, so it does not affect the choice and is left out.
+		return self.decision[u, targets]
+
+
+class BatchedAntColony(AntColony):
+	"""Builds the routes of all ants of an iteration in lockstep, one move of every ant per step."""
+
+	def __construct_routes__(self) -> List[CompactRoute]:
+		ants = numpy.arange(self.ants_count)
+		cost = self.cost
+		demand = self.matrix.demand
+		decision = self.decision_table()
+
+		visited = numpy.zeros((self.ants_count, self.nodes_count), dtype = bool)
+		visited[:, DEPOT_INDEX] = True
+		unvisited_count = numpy.full(self.ants_count, self.nodes_count - 1)
+
+		tours = numpy.zeros((self.ants_count, 2 * self.nodes_count + 1), dtype = numpy.int32)
+		tour_sizes = numpy.ones(self.ants_count, dtype = int)
+		current = numpy.zeros(self.ants_count, dtype = int)
+		load = numpy.zeros(self.ants_count)
+		route = numpy.zeros(self.ants_count)
+		rlen = numpy.zeros(self.ants_count)
+
+		active = ants
+		while len(active):
+			self.profile.count('ant_steps', len(active))
+			next_nodes = self.__next_nodes__(current[active], visited[active], decision)
+			costs = cost[current[active], next_nodes]
+
+			dist_to_depot = costs + cost[next_nodes, DEPOT_INDEX]
+			returning = (
+					(load[active] + demand[next_nodes] > self.truck_capacity) |
+					(route[active] + dist_to_depot > self.truck_route_limit)
+			)
+			if returning.any():
+				for c in numpy.unique(current[active[returning]]):
+					self.__return_to_depot__(c)
+
+				next_nodes[returning] = DEPOT_INDEX
+				costs[returning] = cost[current[active[returning]], DEPOT_INDEX]
+
+			moving = active[~returning]
+			visited[moving, next_nodes[~returning]] = True
+			unvisited_count[moving] -= 1
+			load[moving] += demand[next_nodes[~returning]]
+			route[moving] += costs[~returning]
+			load[active[returning]] = 0
+			route[active[returning]] = 0
+
+			rlen[active] += costs
+			tours[active, tour_sizes[active]] = next_nodes
+			tour_sizes[active] += 1
+			current[active] = next_nodes
+
+			active = active[unvisited_count[active] > 0]
+
+		unfinished = ants[current != DEPOT_INDEX]
+		for c in numpy.unique(current[unfinished]):
+			self.__return_to_depot__(c)
+		rlen[unfinished] += cost[current[unfinished], DEPOT_INDEX]
+		tour_sizes[unfinished] += 1
+		self.profile.count('ant_steps', len(unfinished))
+
+		routes = [CompactRoute(tours[ant, :tour_sizes[ant]], rlen[ant]) for ant in ants]
+		if self.route_optimizer:
+			return self.__optimize_routes__(routes)
+
+		return routes
+
+	def __next_nodes__(self, current: numpy.ndarray, visited: numpy.ndarray, decision: numpy.ndarray) -> numpy.ndarray:
+		next_nodes = numpy.empty(len(current), dtype = int)
+		exhausted = numpy.ones(len(current), dtype = bool)
+
+		if self.candidate_index is not None:
+			targets = self.candidate_index[current]
+			allowed = ~numpy.take_along_axis(visited, targets, axis = 1)
+			exhausted = ~allowed.any(axis = 1)
+
+			found = numpy.flatnonzero(~exhausted)
+			targets = targets[found]
+			node_weights = numpy.where(allowed[found], decision[current[found, numpy.newaxis], targets], 0)
+			next_nodes[found] = targets[numpy.arange(len(found)), self.__pick__(node_weights, allowed[found])]
+
+		if exhausted.any():
+			if self.candidate_index is not None:
+				self.profile.count('candidate_fallbacks', exhausted.sum())
+			allowed = self.neighbors[current[exhausted]] & ~visited[exhausted]
+			stuck = ~allowed.any(axis = 1)
+			if stuck.any():
+				node = self.matrix.nodes[current[exhausted][numpy.argmax(stuck)]]
+				raise CVRPException(f'Invalid problem definition: no route from {node}')
+
+			next_nodes[exhausted] = self.__pick__(numpy.where(allowed, decision[current[exhausted]], 0), allowed)
+
+		return next_nodes
+
+	def __pick__(self, node_weights: numpy.ndarray, allowed: numpy.ndarray) -> numpy.ndarray:
+		# Rows whose factors all underflowed to zero would pick a masked node, they weigh the allowed ones equally.
+		zero_rows = ~(node_weights.max(axis = 1) > 0)
+		if zero_rows.any():
+			node_weights = numpy.where(zero_rows[:, numpy.newaxis], allowed, node_weights)
+		picks = numpy.argmax(node_weights, axis = 1)
+
+		randomized = self.uniforms.take(len(node_weights)) < self.solver.rand_chance
+		if randomized.any():
+			cumulative_weights = numpy.cumsum(node_weights[randomized], axis = 1)
+			totals = cumulative_weights[:, -1:]
+			thresholds = self.uniforms.take(len(cumulative_weights))[:, numpy.newaxis] * totals
+			randomized_picks = numpy.sum(cumulative_weights <= thresholds, axis = 1)
+			# A threshold rounded up to the total takes the last node of non-zero weight.
+			picks[randomized] = numpy.minimum(randomized_picks, numpy.argmax(cumulative_weights >= totals, axis = 1))
+
+		return picks
@@ -0,0 +1,114 @@
+from typing import List
+
+import numpy
+
+from .aco_cvrp_solver import AntColonyCVRPSolver
+from .compact_route import CompactRoute
+from .cvrp_solver import CVRPDefinition
+from .matrix_ant_colony import AntColony, MatrixAntColony, BatchedAntColony
+from .parallel_ant_colony import ParallelAntColony
+
+
+class MaxMinPheromoneUpdate:
+	"""
+	MAX-MIN Ant System pheromone update for the ant colonies: only the iteration best route deposits, or the global
+	best one every global_best_interval iterations, and trails are kept within [tau_min, tau_max]. Trails start at
+	tau_max and are reset to it when the best route has not improved for restart_stagnation iterations.
+
+	The whole decision table is rebuilt every iteration: trails at tau_min, most of them once the colony has
+	converged, are raised back to it after every evaporation, so every row changes.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.iteration = 0
+		self.last_improvement = 0
+		self.last_best_len = self.best_route_len
+		self.restarts = 0
+		self.trails_reset = False
+
+	def __update_pheromone__(self, routes: List[CompactRoute]):
+		self.iteration += 1
+		if self.best_route_len < self.last_best_len:
+			self.last_best_len = self.best_route_len
+			self.last_improvement = self.iteration
+
+		tau_max, tau_min = self.__pheromone_bounds__()
+		if not self.trails_reset or self.iteration - self.last_improvement >= self.solver.restart_stagnation:
+			if self.trails_reset:
+				self.restarts += 1
+			self.last_improvement = self.iteration
+			self.trails_reset = True
+			self.pheromone[:] = tau_max
+			self.pheromone_scale = 1.0
+			self.__invalidate_decision__()
+			return
+
+		if self.iteration % self.solver.global_best_interval == 0:
+			depositing = self.best_route
+		else:
+			depositing = min(routes, key = lambda route: route.length)
+
+		self.__evaporate_pheromone__()
+		self.__deposit_pheromone__([depositing])
+		numpy.clip(
+			self.pheromone, tau_min / self.pheromone_scale, tau_max / self.pheromone_scale, out = self.pheromone
+		)
+		# Stored bounds move with the decay scale, so clipping changes every row holding a trail at either bound.
+		self.__invalidate_decision__()
+
+	def __pheromone_bounds__(self):
+		tau_max = self.solver.pheromone_factor / (self.solver.evaporation_factor * self.best_route_len)
+
+		# Bound for which the best route is built with probability p_best once the colony has converged.
+		p_root = self.solver.p_best ** (1 / self.nodes_count)
+		tau_min = tau_max * (1 - p_root) / ((self.nodes_count / 2 - 1) * p_root)
+		return tau_max, min(tau_min, tau_max)
+
+
+class MaxMinAntColony(MaxMinPheromoneUpdate, MatrixAntColony):
+	pass
+
+
+class BatchedMaxMinAntColony(MaxMinPheromoneUpdate, BatchedAntColony):
+	pass
+
+
+class ParallelMaxMinAntColony(MaxMinPheromoneUpdate, ParallelAntColony):
+	pass
+
+
+class MaxMinAntColonyCVRPSolver(AntColonyCVRPSolver):
+	"""
+	MAX-MIN Ant System. Bounded trails keep exploring without the deposits of every ant, so good routes are found
+	in far fewer iterations; the lower evaporation factor is the one recommended for MMAS.
+	"""
+
+	def __init__(
+			self, iterations: int, p_best = 0.05, global_best_interval = 10, restart_stagnation = 250,
+			evaporation_factor = 0.02, backend = 'batched', **kwargs
+	):
+		if backend == 'graph':
+			raise ValueError('MAX-MIN Ant System requires the matrix or batched backend')
+
+		super().__init__(iterations, evaporation_factor = evaporation_factor, backend = backend, **kwargs)
+		if self.giant_tour:
+			raise ValueError('MAX-MIN Ant System does not support giant tour construction')
+		if self.savings_seed:
+			# Trails start at tau_max and are clamped to it, so a seed on top of them would have no effect.
+			raise ValueError('MAX-MIN Ant System does not support savings seeded trails')
+		self.p_best = p_best
+		self.global_best_interval = global_best_interval
+		self.restart_stagnation = restart_stagnation
+
+	def get_info(self) -> str:
+		return f'MMAS{super().get_info()[len("ACO"):]}'
+
+	def create_colony(self, problem: CVRPDefinition, rng: numpy.random.Generator) -> AntColony:
+		self.check_problem(problem)
+		colony_type = BatchedMaxMinAntColony if self.backend == 'batched' else MaxMinAntColony
+		if self.workers > 1:
+			# Workers only build routes, the bounded update runs in the main process.
+			worker_type = BatchedAntColony if self.backend == 'batched' else MatrixAntColony
+			return ParallelMaxMinAntColony(worker_type, self, problem, rng, self.workers)
+		return colony_type(self, problem, rng)
@@ -0,0 +1,152 @@
+"""
+Microbenchmarks of the ACO hot path phases on the bundled example instances.
+
+	python -m cvrp.microbenchmark [--instances A-n33-k5.vrp ...] [--save base.json] [--compare base.json]
+
+Every phase is timed with timeit and reported as the best time per call out of several repeats. With --compare the
+results are checked against a saved run and the exit status is 1 when any phase got slower than the tolerance.
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy
+
+from .aco_cvrp_solver import AntColonyCVRPSolver
+from .augerat_loader import load_augerat_example
+from .compact_route import CompactRoute
+from .cvrp_solver import CVRPDefinition, Truck, DEPOT
+from .local_search import LocalSearch
+from .matrix_ant_colony import MatrixAntColony, BatchedAntColony
+from .route_optimizer import HeldKarpRouteOptimizer
+from .solution_validator import validate_routes
+from .util import route_len
+
+DEFAULT_INSTANCES = ['A-n33-k5.vrp', 'A-n60-k9.vrp', 'A-n80-k10.vrp']
+DEFAULT_TOLERANCE = 0.2
+# Share of random moves of the matrix colony that the cumulative row sampling must serve without a full scan.
+MIN_SAMPLING_ACCEPTANCE = 0.6
+
+
+def _phases(problem: CVRPDefinition) -> Dict[str, Callable[[], object]]:
+	solver = AntColonyCVRPSolver(iterations = 1, candidate_fraction = 0.25)
+	solver.set_rng(numpy.random.default_rng(0))
+	graph = problem.graph.copy()
+	for e in graph.edges(data = True):
+		e[2]['pheromone'] = solver.init_pheromone
+
+	matrix = problem.get_matrix()
+	candidate_lists = solver.__prepare_candidate_lists__(matrix)
+	customers = [v for v in graph.nodes if v != DEPOT]
+	matrix_colony = MatrixAntColony(solver, problem, numpy.random.default_rng(0))
+	batched_colony = BatchedAntColony(solver, problem, numpy.random.default_rng(0))
+	routes = batched_colony.__construct_routes__()
+	route = min(routes, key = lambda r: r.length)
+	solution = route.to_graph(matrix, problem.graph)
+
+	def make_move():
+		truck = Truck(graph, problem.truck_capacity, problem.truck_route_limit)
+		for v in customers:
+			truck.make_move(v)
+
+	def permute_routes():
+		optimizer = HeldKarpRouteOptimizer(matrix)
+		for r in routes[:10]:
+			optimizer.optimize_solution(r)
+
+	def refresh_decision_table():
+		batched_colony.deposit(routes[:1])
+		batched_colony.decision_table()
+
+	return {
+		'graph next_node': lambda: solver.__next_node__(graph, None, DEPOT, forbidden = { DEPOT }),
+		'graph next_node M2': lambda: solver.__next_node__(graph, candidate_lists, DEPOT, forbidden = { DEPOT }),
+		'truck make_move (all customers)': make_move,
+		'graph ant route': lambda: solver.__find_ant_route__(
+			graph, matrix, None, None, problem.truck_capacity, problem.truck_route_limit
+		),
+		'graph route_len': lambda: route_len(solution),
+		'graph update_pheromone': lambda: solver.__update_pheromone__(graph, matrix, routes),
+		'held-karp permute (10 routes, cold)': permute_routes,
+		'matrix ant route': matrix_colony.__find_ant_route__,
+		'batched construct (all ants)': batched_colony.__construct_routes__,
+		'colony update_pheromone': lambda: batched_colony.__update_pheromone__(routes),
+		'decision table refresh (one route)': refresh_decision_table,
+		'local search (iteration best)': lambda: LocalSearch().improve(
+			route, matrix, problem.truck_capacity, problem.truck_route_limit
+		),
+		'validate_routes (all ants)': lambda: validate_routes(problem, routes),
+		'compact route from graph': lambda: CompactRoute.from_graph(solution, matrix),
+	}
+
+
+def run_microbenchmarks(instances: List[str], repeat = 5, path = Path('examples/')) -> Dict[str, float]:
+	"""Returns the best time per call in seconds, keyed by 'instance | phase'."""
+	results = { }
+	for instance in instances:
+		problem = load_augerat_example(instance, path)
+		for phase, function in _phases(problem).items():
+			timer = timeit.Timer(function)
+			number, _ = timer.autorange()
+			results[f'{instance} | {phase}'] = min(timer.repeat(repeat = repeat, number = number)) / number
+	return results
+
+
+def sampling_acceptance(instances: List[str], iterations = 10, path = Path('examples/')) -> Dict[str, float]:
+	"""Share of the random moves of the matrix colony accepted by rejection sampling, keyed by instance."""
+	results = { }
+	for instance in instances:
+		solver = AntColonyCVRPSolver(iterations, backend = 'matrix', profile = True)
+		solver.set_rng(numpy.random.default_rng(0))
+		solver.solve_cvrp(load_augerat_example(instance, path))
+		counters = solver.last_profile.counters
+		sampled = counters.get('sampled_moves', 0)
+		results[instance] = sampled / max(sampled + counters.get('sampling_fallbacks', 0), 1)
+	return results
+
+
+def find_regressions(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+	return [
+		f'{name}: {baseline[name] * 1e6:.1f} us -> {seconds * 1e6:.1f} us'
+		for name, seconds in results.items()
+		if name in baseline and seconds > baseline[name] * (1 + tolerance)
+	]
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Microbenchmarks of the ACO hot path')
+	parser.add_argument('--instances', nargs = '+', default = DEFAULT_INSTANCES)
+	parser.add_argument('--repeat', type = int, default = 5)
+	parser.add_argument('--save', type = Path)
+	parser.add_argument('--compare', type = Path)
+	parser.add_argument('--tolerance', type = float, default = DEFAULT_TOLERANCE)
+	args = parser.parse_args()
+
+	results = run_microbenchmarks(args.instances, args.repeat)
+	for name, seconds in results.items():
+		print(f'{name:<60} {seconds * 1e6:12.1f} us')
+
+	low_acceptance = []
+	for instance, acceptance in sampling_acceptance(args.instances).items():
+		print(f'{instance + " | sampling acceptance":<60} {acceptance:12.1%}')
+		if acceptance < MIN_SAMPLING_ACCEPTANCE:
+			low_acceptance.append(instance)
+
+	if args.save:
+		with open(args.save, mode = 'wt') as file:
+			json.dump(results, file, indent = 1)
+
+	if args.compare:
+		with open(args.compare) as file:
+			regressions = find_regressions(results, json.load(file), args.tolerance)
+		for regression in regressions:
+			print(f'REGRESSION {regression}')
+		if regressions:
+			sys.exit(1)
+
+	for instance in low_acceptance:
+		print(f'LOW SAMPLING ACCEPTANCE {instance}')
+	sys.exit(1 if low_acceptance else 0)
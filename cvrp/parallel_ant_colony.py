@@ -0,0 +1,123 @@
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Type, TYPE_CHECKING
+
+import numpy
+
+from .compact_route import CompactRoute
+from .cvrp_solver import CVRPDefinition
+from .matrix_ant_colony import AntColony
+from .profiling import SolverProfile
+
+if TYPE_CHECKING:
+	from .aco_cvrp_solver import AntColonyCVRPSolver
+
+# Seconds a worker gets to exit after being told to stop, before it is terminated.
+WORKER_JOIN_TIMEOUT = 5.0
+
+
+def _colony_worker(
+		connection: Connection, colony_type: Type[AntColony], solver: 'AntColonyCVRPSolver',
+		problem: CVRPDefinition, rng: numpy.random.Generator, ants_count: int, decision_name: str
+):
+	decision_memory = SharedMemory(name = decision_name)
+	try:
+		colony = colony_type(solver, problem, rng)
+		colony.ants_count = ants_count
+		colony.decision = numpy.ndarray(
+			colony.decision.shape, dtype = colony.decision.dtype, buffer = decision_memory.buf
+		)
+
+		while connection.recv():
+			# The shared decision table changed behind the colony, which refreshes what it derives from it.
+			colony.__decision_changed__()
+			connection.send(colony.__construct_routes__())
+		connection.send(colony.collect_profile())
+	except Exception as error:
+		# The main process re-raises the error instead of failing on a closed pipe.
+		connection.send(error)
+	finally:
+		decision_memory.close()
+
+
+class ParallelAntColony(AntColony):
+	"""
+	Spreads the ants of every iteration over worker processes. Workers read the decision table from shared
+	memory and send back compact routes, pheromone and decision factors are updated only here. Each worker owns
+	an RNG stream spawned from the solver's generator, so results are reproducible for a fixed seed and worker count.
+	"""
+
+	def __init__(
+			self, colony_type: Type[AntColony], solver: 'AntColonyCVRPSolver', problem: CVRPDefinition,
+			rng: numpy.random.Generator, workers: int
+	):
+		super().__init__(solver, problem, rng)
+
+		self.decision_memory = SharedMemory(create = True, size = self.decision.nbytes)
+		shared_decision = numpy.ndarray(
+			self.decision.shape, dtype = self.decision.dtype, buffer = self.decision_memory.buf
+		)
+		shared_decision[:] = self.decision
+		self.decision = shared_decision
+
+		self.connections: List[Connection] = []
+		self.processes: List[multiprocessing.Process] = []
+		self.worker_profiles: List[SolverProfile] = []
+		try:
+			ant_batches = numpy.array_split(numpy.arange(self.ants_count), workers)
+			for worker_rng, ants in zip(rng.spawn(workers), ant_batches):
+				connection, worker_connection = multiprocessing.Pipe()
+				process = multiprocessing.Process(
+					target = _colony_worker, daemon = True, args = (
+						worker_connection, colony_type, solver, problem, worker_rng, len(ants),
+						self.decision_memory.name
+					)
+				)
+				process.start()
+				self.connections.append(connection)
+				self.processes.append(process)
+		except BaseException:
+			self.close()
+			raise
+
+	def __construct_routes__(self) -> List[CompactRoute]:
+		self.decision_table()
+		for connection in self.connections:
+			connection.send(True)
+
+		replies = [connection.recv() for connection in self.connections]
+		routes = []
+		for reply in replies:
+			if isinstance(reply, Exception):
+				raise reply
+			routes += reply
+		return routes
+
+	def close(self):
+		"""Stops the workers, tolerating those that already died, and always releases the shared memory."""
+		try:
+			for connection in self.connections:
+				try:
+					connection.send(False)
+					reply = connection.recv()
+				except (EOFError, OSError):
+					continue
+				if isinstance(reply, SolverProfile):
+					self.worker_profiles.append(reply)
+		finally:
+			for process in self.processes:
+				process.join(WORKER_JOIN_TIMEOUT)
+				if process.is_alive():
+					process.terminate()
+					process.join()
+
+			self.decision = self.decision.copy()
+			self.decision_memory.close()
+			self.decision_memory.unlink()
+
+	def collect_profile(self) -> SolverProfile:
+		profile = super().collect_profile()
+		for worker_profile in self.worker_profiles:
+			profile.merge(worker_profile)
+		return profile
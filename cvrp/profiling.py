@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+
+class SolverProfile:
+	"""
+	Wall-clock time spent in each solver phase and counters of hot path events. Nested phases are also included in
+	the time of the phase around them; phases run by worker processes are summed over the workers.
+	"""
+
+	def __init__(self):
+		self.timings: Dict[str, float] = { }
+		self.counters: Dict[str, int] = { }
+
+	@contextmanager
+	def phase(self, name: str):
+		start_time = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start_time
+
+	def count(self, name: str, amount = 1):
+		self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+	def record(self, name: str, value: int):
+		self.counters[name] = int(value)
+
+	def merge(self, other: 'SolverProfile'):
+		for name, value in other.timings.items():
+			self.timings[name] = self.timings.get(name, 0.0) + value
+		for name, value in other.counters.items():
+			self.count(name, value)
+
+	def __str__(self):
+		lines = [f'{name:<24} {value:10.4f} s' for name, value in self.timings.items()]
+		lines += [f'{name:<24} {value:10d}' for name, value in self.counters.items()]
+		return '\n'.join(lines)
+
+
+class DisabledProfile(SolverProfile):
+	"""Stand-in used when profiling is off, so the hot path calls the same methods at almost no cost."""
+
+	def phase(self, name: str):
+		return _NO_PHASE
+
+	def count(self, name: str, amount = 1):
+		pass
+
+	def record(self, name: str, value: int):
+		pass
+
+	def merge(self, other: SolverProfile):
+		pass
+
+
+_NO_PHASE = nullcontext()
+
+
+def create_profile(enabled: bool) -> SolverProfile:
+	return SolverProfile() if enabled else DisabledProfile()
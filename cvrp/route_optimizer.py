@@ -0,0 +1,94 @@
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+import numpy
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import CVRPMatrix, DEPOT_INDEX
+
+
+class HeldKarpRouteOptimizer:
+	"""
+	Orders the customers of a single route optimally with the Held-Karp bitmask dynamic program. Results are
+	memoized by the customer set, as ants keep producing the same route clusters. Routes longer than max_customers
+	are returned unchanged.
+	"""
+
+	def __init__(self, matrix: CVRPMatrix, max_customers = 12):
+		self.matrix = matrix
+		self.max_customers = max_customers
+		self.cache: Dict[FrozenSet[int], Tuple[List[int], float]] = { }
+		self.evaluations = 0
+
+	def optimize(self, route: Sequence[int]) -> Tuple[List[int], float]:
+		route = list(route)
+		if len(route) > self.max_customers:
+			return route, self.route_len(route)
+
+		key = frozenset(route)
+		if key not in self.cache:
+			self.cache[key] = self.__solve__(sorted(route))
+		return self.cache[key]
+
+	def optimize_solution(self, solution: CompactRoute) -> CompactRoute:
+		optimized_routes = []
+		optimized_len = 0
+
+		for route in solution.routes():
+			route, rlen = self.optimize(route.tolist())
+			optimized_routes.append(route)
+			optimized_len += rlen
+
+		return CompactRoute.from_routes(optimized_routes, optimized_len)
+
+	def route_len(self, route: Sequence[int]) -> float:
+		cost = self.matrix.cost_rows()
+		rlen = cost[DEPOT_INDEX][route[0]] + cost[route[-1]][DEPOT_INDEX]
+		for i in range(1, len(route)):
+			rlen += cost[route[i - 1]][route[i]]
+		return rlen
+
+	def __solve__(self, customers: List[int]) -> Tuple[List[int], float]:
+		self.evaluations += 1
+		k = len(customers)
+		nodes = [DEPOT_INDEX] + customers
+		cost = numpy.asarray(self.matrix.cost[numpy.ix_(nodes, nodes)], dtype = float)
+		between = cost[1:, 1:]
+		bits = 1 << numpy.arange(k)
+
+		# dp[mask, j]: shortest path leaving the depot, visiting the customers in mask and ending at customer j.
+		dp = numpy.full((1 << k, k), numpy.inf)
+		parent = numpy.zeros((1 << k, k), dtype = numpy.int8)
+		dp[bits, numpy.arange(k)] = cost[0, 1:]
+
+		for masks in _masks_by_size(k)[2:]:
+			prev = masks[:, numpy.newaxis] ^ bits[numpy.newaxis, :]
+			candidates = dp[prev] + between.T[numpy.newaxis, :, :]
+			best = numpy.argmin(candidates, axis = 2)
+			values = numpy.take_along_axis(candidates, best[:, :, numpy.newaxis], axis = 2)[:, :, 0]
+
+			contains_j = (masks[:, numpy.newaxis] & bits[numpy.newaxis, :]) != 0
+			dp[masks] = numpy.where(contains_j, values, numpy.inf)
+			parent[masks] = best
+
+		full = (1 << k) - 1
+		closing = dp[full] + cost[1:, 0]
+		last = int(numpy.argmin(closing))
+
+		order = []
+		mask = full
+		while mask:
+			order.append(customers[last])
+			mask, last = mask ^ (1 << last), int(parent[mask, last])
+
+		return order[::-1], float(closing.min())
+
+
+_masks_cache: Dict[int, List[numpy.ndarray]] = { }
+
+
+def _masks_by_size(k: int) -> List[numpy.ndarray]:
+	if k not in _masks_cache:
+		masks = numpy.arange(1 << k)
+		sizes = ((masks[:, numpy.newaxis] >> numpy.arange(k)) & 1).sum(axis = 1)
+		_masks_cache[k] = [masks[sizes == size] for size in range(k + 1)]
+	return _masks_cache[k]
@@ -0,0 +1,55 @@
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+import numpy
+
+DEFAULT_BLOCK_SIZE = 16384
+
+
+class UniformBlock:
+	"""
+	Uniform [0, 1) variates of a Generator drawn in blocks. A draw of a single variate costs about as much as one of
+	thousands, so per-step draws are served from the current block instead of calling rng.random() every time.
+	"""
+
+	def __init__(self, rng: numpy.random.Generator, block_size = DEFAULT_BLOCK_SIZE):
+		self.rng = rng
+		self.block_size = block_size
+		self.values = numpy.empty(0)
+		self.position = 0
+
+	def next(self) -> float:
+		if self.position >= len(self.values):
+			self.__refill__(1)
+		value = self.values.item(self.position)
+		self.position += 1
+		return value
+
+	def take(self, count: int) -> numpy.ndarray:
+		if self.position + count > len(self.values):
+			self.__refill__(count)
+		values = self.values[self.position:self.position + count]
+		self.position += count
+		return values
+
+	def __refill__(self, count: int):
+		self.values = numpy.concatenate([
+			self.values[self.position:], self.rng.random(max(self.block_size, count))
+		])
+		self.position = 0
+
+
+def roulette_pick(cumulative: Sequence[float], u: float) -> int:
+	"""
+	Index picked by roulette wheel selection with the uniform variate u from cumulative weights, by binary search.
+	Zero weights are never picked, unless all of them are zero, in which case the pick is uniform.
+	"""
+	total = cumulative[-1]
+	if not total > 0:
+		return min(int(u * len(cumulative)), len(cumulative) - 1)
+
+	index = bisect_right(cumulative, u * total)
+	if index >= len(cumulative):
+		# u * total rounded up to the total: take the last node of non-zero weight.
+		index = bisect_left(cumulative, total)
+	return index
@@ -0,0 +1,119 @@
+import heapq
+import time
+from typing import Iterator, List
+
+import numpy
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import DEPOT_INDEX
+from .cvrp_solver import CVRPSolver, CVRPDefinition, CVRPException, SolutionUpdate
+
+
+class SavingsCVRPSolver(CVRPSolver):
+	"""
+	Clarke-Wright savings heuristic. Every customer starts on its own route; routes are then joined end to start in
+	the order of the savings c(i, 0) + c(0, j) - c(i, j) of linking customer i to customer j, as long as the joined
+	route respects the truck capacity and route limit. For symmetric costs routes may also be joined reversed.
+	Savings are only computed for the neighbors_count nearest neighbours of each customer, which keeps the heap
+	at O(n * k) entries for large instances; None considers all pairs.
+	"""
+
+	def __init__(self, neighbors_count = 40):
+		self.neighbors_count = neighbors_count
+
+	def get_info(self) -> str:
+		return 'CW'
+
+	def solve_iter(self, problem: CVRPDefinition) -> Iterator[SolutionUpdate]:
+		start_time = time.perf_counter()
+		route = savings_route(problem, self.neighbors_count)
+		yield SolutionUpdate(problem, 1, time.perf_counter() - start_time, route.length, route)
+
+
+def savings_route(problem: CVRPDefinition, neighbors_count = 40) -> CompactRoute:
+	matrix = problem.get_matrix()
+	cost = matrix.cost
+	demand = matrix.demand.tolist()
+	symmetric = matrix.is_symmetric()
+	customers_count = len(cost) - 1
+
+	single_lengths = numpy.asarray(cost[DEPOT_INDEX, :] + cost[:, DEPOT_INDEX], dtype = float)
+	infeasible = (matrix.demand > problem.truck_capacity) | (single_lengths > problem.truck_route_limit)
+	infeasible[DEPOT_INDEX] = False
+	if infeasible.any():
+		node = matrix.nodes[int(numpy.argmax(infeasible))]
+		raise CVRPException(f'Invalid problem definition: client {node} cannot be served by any truck')
+
+	routes: List[List[int]] = [[v] for v in range(len(cost))]
+	owner = list(range(len(cost)))
+	loads = list(demand)
+	lengths = single_lengths.tolist()
+
+	def find(v: int) -> int:
+		while owner[v] != v:
+			owner[v] = owner[owner[v]]
+			v = owner[v]
+		return v
+
+	for negative_saving, i, j in _savings_heap(cost, matrix, symmetric, neighbors_count):
+		a, b = find(i), find(j)
+		if a == b or loads[a] + loads[b] > problem.truck_capacity:
+			continue
+
+		route_a, route_b = routes[a], routes[b]
+		if route_a[-1] != i:
+			if not symmetric or route_a[0] != i:
+				continue
+			route_a.reverse()
+		if route_b[0] != j:
+			if not symmetric or route_b[-1] != j:
+				continue
+			route_b.reverse()
+
+		joined_len = lengths[a] + lengths[b] + negative_saving
+		if joined_len > problem.truck_route_limit:
+			continue
+
+		# Union by size: the longer route absorbs the shorter one.
+		if len(route_a) >= len(route_b):
+			route_a += route_b
+			root, merged = a, b
+		else:
+			route_b[:0] = route_a
+			root, merged = b, a
+		owner[merged] = root
+		loads[root] += loads[merged]
+		lengths[root] = joined_len
+		routes[merged] = []
+
+	final_routes = [routes[v] for v in range(1, customers_count + 1) if owner[v] == v]
+	return CompactRoute.from_routes(final_routes, float(sum(lengths[find(route[0])] for route in final_routes)))
+
+
+def _savings_heap(cost, matrix, symmetric: bool, neighbors_count) -> Iterator:
+	"""Yields (-saving, i, j) from the largest saving down, negated as stored in the min-heap."""
+	customers_count = len(cost) - 1
+	if neighbors_count is None or neighbors_count >= customers_count:
+		src, dest = numpy.nonzero(~numpy.eye(customers_count, dtype = bool))
+		src += 1
+		dest += 1
+	else:
+		nearest = matrix.nearest_neighbors(neighbors_count)[1:]
+		src = numpy.repeat(numpy.arange(1, len(cost)), nearest.shape[1])
+		dest = nearest.ravel()
+		if not symmetric:
+			src, dest = numpy.concatenate([src, dest]), numpy.concatenate([dest, src])
+
+	if symmetric:
+		src, dest = numpy.minimum(src, dest), numpy.maximum(src, dest)
+	valid = (src != dest) & (src != DEPOT_INDEX) & (dest != DEPOT_INDEX)
+	pairs = numpy.unique(numpy.stack([src[valid], dest[valid]], axis = 1), axis = 0)
+	src, dest = pairs[:, 0], pairs[:, 1]
+
+	savings = numpy.asarray(cost[src, DEPOT_INDEX] + cost[DEPOT_INDEX, dest] - cost[src, dest], dtype = float)
+	positive = numpy.isfinite(savings) & (savings > 0)
+
+	heap = list(zip((-savings[positive]).tolist(), src[positive].tolist(), dest[positive].tolist()))
+	heapq.heapify(heap)
+	while heap:
+		yield heapq.heappop(heap)
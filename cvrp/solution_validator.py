@@ -1,5 +1,12 @@
+from typing import List
+
+import numpy
 from networkx import DiGraph
 
+from .compact_route import CompactRoute
+from .cvrp_matrix import DEPOT_INDEX
+from .cvrp_solver import CVRPDefinition
+
 
 def is_cvrp_solution_valid(solution: DiGraph, truck_capacity: float, truck_route_limit: float) -> bool:
 	depot = 'Depot'
@@ -30,3 +37,94 @@ def is_cvrp_solution_valid(solution: DiGraph, truck_capacity: float, truck_route
 			current_node = neighbors[0]
 
 	return len(visited_clients) == len(solution.nodes) - 1
+
+
+class ValidationReport:
+	"""Per-solution results of validate_tours; every attribute is an array with one entry per validated tour."""
+
+	def __init__(
+			self, lengths: numpy.ndarray, overloaded_routes: numpy.ndarray, too_long_routes: numpy.ndarray,
+			missing_customers: numpy.ndarray, duplicated_customers: numpy.ndarray, missing_edges: numpy.ndarray,
+			malformed: numpy.ndarray
+	):
+		self.lengths = lengths
+		self.overloaded_routes = overloaded_routes
+		self.too_long_routes = too_long_routes
+		self.missing_customers = missing_customers
+		self.duplicated_customers = duplicated_customers
+		self.missing_edges = missing_edges
+		self.malformed = malformed
+		self.valid = ~malformed & (
+				overloaded_routes + too_long_routes + missing_customers + duplicated_customers + missing_edges == 0
+		)
+
+	def violations(self, i: int) -> List[str]:
+		checks = [
+			('malformed tour', int(self.malformed[i])),
+			('overloaded routes', self.overloaded_routes[i]),
+			('routes over the length limit', self.too_long_routes[i]),
+			('missing customers', self.missing_customers[i]),
+			('duplicated customers', self.duplicated_customers[i]),
+			('edges missing from the graph', self.missing_edges[i]),
+		]
+		return [f'{name}: {count}' for name, count in checks if count]
+
+
+def pad_tours(routes: List[CompactRoute]) -> numpy.ndarray:
+	"""Stacks giant tours into one array, padding them with depot visits which add nothing to length or load."""
+	tours = numpy.full((len(routes), max(len(route.tour) for route in routes)), DEPOT_INDEX, dtype = numpy.int32)
+	for i, route in enumerate(routes):
+		tours[i, :len(route.tour)] = route.tour
+	return tours
+
+
+def tour_lengths(tours: numpy.ndarray, cost: numpy.ndarray) -> numpy.ndarray:
+	tours = numpy.atleast_2d(tours)
+	return cost[tours[:, :-1], tours[:, 1:]].sum(axis = 1)
+
+
+def validate_tours(
+		tours: numpy.ndarray, demand: numpy.ndarray, cost: numpy.ndarray, truck_capacity: float,
+		truck_route_limit: float
+) -> ValidationReport:
+	tours = numpy.atleast_2d(tours)
+	tours_count, tour_size = tours.shape
+	nodes_count = len(demand)
+
+	malformed = (tours[:, 0] != DEPOT_INDEX) | (tours[:, -1] != DEPOT_INDEX) | \
+		((tours < 0) | (tours >= nodes_count)).any(axis = 1)
+	tours = numpy.where(malformed[:, numpy.newaxis], DEPOT_INDEX, tours)
+
+	visits = numpy.bincount(
+		(numpy.arange(tours_count)[:, numpy.newaxis] * nodes_count + tours).ravel(),
+		minlength = tours_count * nodes_count
+	).reshape(tours_count, nodes_count)[:, 1:]
+
+	# Every depot visit opens a new route segment; an edge belongs to the segment of its source node.
+	segments = numpy.cumsum(tours == DEPOT_INDEX, axis = 1) - 1
+	segments += numpy.arange(tours_count)[:, numpy.newaxis] * tour_size
+	segment_loads = numpy.bincount(
+		segments.ravel(), weights = demand[tours].ravel(), minlength = tours_count * tour_size
+	).reshape(tours_count, tour_size)
+
+	edge_costs = cost[tours[:, :-1], tours[:, 1:]]
+	segment_lengths = numpy.bincount(
+		segments[:, :-1].ravel(), weights = edge_costs.ravel(), minlength = tours_count * tour_size
+	).reshape(tours_count, tour_size)
+
+	return ValidationReport(
+		lengths = edge_costs.sum(axis = 1),
+		overloaded_routes = (segment_loads > truck_capacity).sum(axis = 1),
+		too_long_routes = (segment_lengths > truck_route_limit).sum(axis = 1),
+		missing_customers = (visits == 0).sum(axis = 1),
+		duplicated_customers = (visits > 1).sum(axis = 1),
+		missing_edges = numpy.isinf(edge_costs).sum(axis = 1),
+		malformed = malformed
+	)
+
+
+def validate_routes(problem: CVRPDefinition, routes: List[CompactRoute]) -> ValidationReport:
+	matrix = problem.get_matrix()
+	return validate_tours(
+		pad_tours(routes), matrix.demand, matrix.cost, problem.truck_capacity, problem.truck_route_limit
+	)
@@ -0,0 +1,184 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy
+
+from .aco_cvrp_solver import AntColonyCVRPSolver
+from .compact_route import CompactRoute
+from .cvrp_solver import CVRPDefinition, SolutionUpdate, final_update
+from .instance_cache import CachedCVRPDefinition, load_cached_example, open_cached_instance
+from .stopping import SolveResult
+
+DEADLINE_GRACE = 0.25
+
+ProblemSource = Union[str, Path, CVRPDefinition]
+
+
+_worker_problems: Dict[object, CVRPDefinition] = { }
+
+
+def _problem_key(source: ProblemSource):
+	if isinstance(source, Path):
+		return 'entry', str(source)
+	if isinstance(source, str):
+		return 'instance', source
+	return 'object', id(source)
+
+
+def _problem_source(problem: ProblemSource) -> ProblemSource:
+	# Cached instances travel as their cache entry, so a worker that has seen the entry before reuses its copy.
+	# Other definitions have no name a worker could look them up by and are pickled in full with every request.
+	if isinstance(problem, CachedCVRPDefinition):
+		return problem.cache_entry
+	return problem
+
+
+def _open_problem(source: Union[str, Path]) -> CVRPDefinition:
+	return open_cached_instance(source) if isinstance(source, Path) else load_cached_example(source)
+
+
+def _load_problem(source: ProblemSource) -> CVRPDefinition:
+	if isinstance(source, CVRPDefinition):
+		return source
+
+	key = _problem_key(source)
+	if key not in _worker_problems:
+		problem = _open_problem(source)
+		problem.get_matrix().cost_rows()
+		_worker_problems[key] = problem
+	return _worker_problems[key]
+
+
+def _init_worker(preload: Tuple[str, ...]):
+	for instance_name in preload:
+		_load_problem(instance_name)
+
+
+def _solve_in_worker(
+		source: ProblemSource, solver_config: dict, deadline_at: float, seed: Optional[int], cancel_event
+) -> Optional[Tuple[CompactRoute, SolveResult]]:
+	problem = _load_problem(source)
+	remaining = deadline_at - time.time()
+	if remaining <= 0:
+		return None
+
+	config = dict(solver_config)
+	time_limit = config.get('time_limit')
+	config['time_limit'] = remaining if time_limit is None else min(time_limit, remaining)
+	solver = AntColonyCVRPSolver(**config, cancel_event = cancel_event)
+	solver.set_rng(numpy.random.default_rng(seed))
+
+	return final_update(solver.solve_iter(problem)).route, solver.last_result
+
+
+class SolveResponse(SolutionUpdate):
+	def __init__(self, problem: CVRPDefinition, route: CompactRoute, result: SolveResult):
+		super().__init__(problem, result.iterations, result.elapsed, route.length, route)
+		self.result = result
+
+
+class ServiceOverloaded(Exception):
+	pass
+
+
+class _Batch:
+	def __init__(self, future: asyncio.Future, cancel_event):
+		self.future = future
+		self.cancel_event = cancel_event
+		self.waiters = 0
+
+
+class SolveService:
+	"""
+	Asynchronous front end running AntColonyCVRPSolver on a pool of worker processes.
+
+	Concurrent requests with the same problem, solver configuration and seed share a single run. Workers keep every
+	instance they have loaded, so repeated requests skip compiling the matrices; instances passed as preload are
+	loaded when a worker starts. The deadline of a request counts from the call: time spent waiting for a worker is
+	taken from the time limit of the run, and a run that starts after its deadline is skipped. A run nobody waits
+	for anymore is cancelled, and stops after its current iteration if a worker already picked it up. Requests beyond
+	max_pending concurrent runs are rejected with ServiceOverloaded instead of queueing behind them.
+	"""
+
+	def __init__(self, workers: Optional[int] = None, preload: Iterable[str] = (), max_pending: Optional[int] = None):
+		self.executor = ProcessPoolExecutor(workers, initializer = _init_worker, initargs = (tuple(preload),))
+		# Events of the manager can be passed to runs already submitted to the pool, unlike plain ones.
+		self.manager = multiprocessing.Manager()
+		self.max_pending = max_pending
+		self.batches: Dict[tuple, _Batch] = { }
+		self.problems: Dict[object, CVRPDefinition] = { }
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		self.executor.shutdown(wait = True, cancel_futures = True)
+		self.manager.shutdown()
+
+	async def solve(
+			self, problem: ProblemSource, solver_config: dict, deadline: float, seed: Optional[int] = None
+	) -> SolveResponse:
+		"""
+		Solves a problem given as a CVRPDefinition, the name of an example instance or an instance cache entry.
+		solver_config holds the keyword arguments of AntColonyCVRPSolver and deadline the number of seconds the
+		caller is willing to wait. Raises asyncio.TimeoutError when no solution is ready by the deadline.
+
+		Only example names, cache entries and cached definitions are kept by the workers between requests; any
+		other CVRPDefinition is sent to a worker in full with each request, so a cached instance is the faster way
+		to solve the same problem repeatedly.
+		"""
+		deadline_at = time.time() + deadline
+		source = _problem_source(problem)
+		key = (_problem_key(source), tuple(sorted(solver_config.items())), seed)
+
+		batch = self.batches.get(key)
+		if batch is None:
+			if self.max_pending is not None and len(self.batches) >= self.max_pending:
+				raise ServiceOverloaded(f'{len(self.batches)} runs pending')
+
+			cancel_event = self.manager.Event()
+			future = asyncio.wrap_future(
+				self.executor.submit(_solve_in_worker, source, solver_config, deadline_at, seed, cancel_event)
+			)
+			batch = _Batch(future, cancel_event)
+			self.batches[key] = batch
+			future.add_done_callback(lambda _: self.__finish_batch__(key, batch))
+
+		batch.waiters += 1
+		try:
+			outcome = await asyncio.wait_for(
+				asyncio.shield(batch.future), timeout = max(deadline_at - time.time(), 0) + DEADLINE_GRACE
+			)
+		finally:
+			batch.waiters -= 1
+			if not batch.waiters and not batch.future.done():
+				# Nobody waits for the run anymore: it is dropped from the queue or stopped by its stopping rule.
+				batch.future.cancel()
+				batch.cancel_event.set()
+				self.__finish_batch__(key, batch)
+
+		if outcome is None:
+			raise asyncio.TimeoutError('Request expired before a worker was available')
+
+		route, result = outcome
+		return SolveResponse(self.__local_problem__(problem, source), route, result)
+
+	def __finish_batch__(self, key: tuple, batch: _Batch):
+		if self.batches.get(key) is batch:
+			del self.batches[key]
+
+	def __local_problem__(self, problem: ProblemSource, source: ProblemSource) -> CVRPDefinition:
+		if isinstance(problem, CVRPDefinition):
+			return problem
+
+		key = _problem_key(source)
+		if key not in self.problems:
+			self.problems[key] = _open_problem(source)
+		return self.problems[key]
@@ -0,0 +1,153 @@
+import math
+from typing import List
+
+import numpy
+from networkx import DiGraph
+
+from .cvrp_matrix import DEPOT_INDEX
+
+
+class GridIndex:
+	"""
+	Uniform grid over point coordinates, sized for about cell_occupancy points per cell. Nearest neighbours of all
+	points in a cell are searched together among the cells of a growing square around it, so building the lists
+	takes O(n * k) memory and roughly O(n * k) time for evenly spread points.
+	"""
+
+	def __init__(self, coords: numpy.ndarray, cell_occupancy = 2):
+		self.coords = coords
+		self.origin = coords.min(axis = 0)
+		span = float((coords.max(axis = 0) - self.origin).max()) or 1.0
+		self.side = max(1, int(math.sqrt(len(coords) / cell_occupancy)))
+		self.cell_size = span / self.side * (1 + 1e-9)
+
+		cells = numpy.minimum(((coords - self.origin) // self.cell_size).astype(int), self.side - 1)
+		keys = cells[:, 0] * self.side + cells[:, 1]
+		self.order = numpy.argsort(keys, kind = 'stable')
+		self.cell_starts = numpy.searchsorted(keys[self.order], numpy.arange(self.side * self.side + 1))
+
+	def points_in(self, x0: int, x1: int, y0: int, y1: int) -> numpy.ndarray:
+		"""Points of the cells [x0, x1) x [y0, y1), clipped to the grid."""
+		x0, y0 = max(x0, 0), max(y0, 0)
+		x1, y1 = min(x1, self.side), min(y1, self.side)
+		columns = [
+			self.order[self.cell_starts[x * self.side + y0]:self.cell_starts[x * self.side + y1]] for x in range(x0, x1)
+		]
+		return numpy.concatenate(columns) if columns else numpy.empty(0, dtype = int)
+
+	def nearest_neighbors(self, count: int, excluded: int) -> numpy.ndarray:
+		"""Row i lists the count points closest to point i, leaving out i itself and the point excluded."""
+		count = max(min(count, len(self.coords) - 2), 0)
+		nearest = numpy.zeros((len(self.coords), count), dtype = numpy.int32)
+
+		for x in range(self.side):
+			for y in range(self.side):
+				members = self.points_in(x, x + 1, y, y + 1)
+				if not len(members):
+					continue
+
+				radius = 1
+				while True:
+					candidates = self.points_in(x - radius, x + radius + 1, y - radius, y + radius + 1)
+					candidates = candidates[candidates != excluded]
+					covers_grid = radius >= self.side
+					if len(candidates) > count or covers_grid:
+						deltas = self.coords[members, numpy.newaxis, :] - self.coords[numpy.newaxis, candidates, :]
+						distances = numpy.sqrt(numpy.einsum('ijk,ijk->ij', deltas, deltas))
+						distances[members[:, numpy.newaxis] == candidates[numpy.newaxis, :]] = numpy.inf
+						closest = numpy.argsort(distances, axis = 1, kind = 'stable')[:, :count]
+						# Points outside the square may only be closer than this bound.
+						if covers_grid or distances[numpy.arange(len(members)), closest[:, -1]].max() <= \
+								radius * self.cell_size:
+							nearest[members] = candidates[closest]
+							break
+					radius += 1
+
+		return nearest
+
+
+class EuclideanCosts:
+	"""Read-only stand-in for a dense cost matrix computing rounded Euclidean distances on indexing."""
+
+	def __init__(self, coords: numpy.ndarray):
+		self.coords = coords
+		self.shape = (len(coords), len(coords))
+
+	def __len__(self):
+		return len(self.coords)
+
+	def __getitem__(self, key):
+		rows, columns = (numpy.arange(len(self.coords))[k] if isinstance(k, slice) else k for k in key)
+		deltas = self.coords[rows] - self.coords[columns]
+		return numpy.rint(numpy.sqrt(numpy.sum(deltas * deltas, axis = -1)))
+
+
+class _EuclideanCostRow:
+	__slots__ = ('x', 'y', 'xs', 'ys')
+
+	def __init__(self, xs: list, ys: list, u: int):
+		self.x = xs[u]
+		self.y = ys[u]
+		self.xs = xs
+		self.ys = ys
+
+	def __getitem__(self, v: int) -> float:
+		return float(round(math.hypot(self.x - self.xs[v], self.y - self.ys[v])))
+
+
+class SparseCVRPMatrix:
+	"""
+	Coordinate-based problem without a cost matrix for large instances. Costs are rounded Euclidean distances
+	computed when needed; only the neighbors_count nearest customers of every node are kept, found through a
+	GridIndex, so memory grows as O(n * k). The attributes match CVRPMatrix where they can, cost_rows() and
+	cost index into on-demand distances instead of stored ones.
+	"""
+
+	def __init__(self, nodes: list, coords: numpy.ndarray, demand: numpy.ndarray, neighbors_count = 20):
+		self.nodes = nodes
+		self.node_index = { v: i for i, v in enumerate(nodes) }
+		self.coords = numpy.asarray(coords, dtype = float)
+		self.demand = demand
+		self.neighbors_count = neighbors_count
+		self.grid = GridIndex(self.coords)
+		self.cost = EuclideanCosts(self.coords)
+		self.neighbors = self.grid.nearest_neighbors(neighbors_count, excluded = DEPOT_INDEX)
+		self.nearest_neighbors_cache = { }
+		self.cost_row_lists = None
+
+	def cost_rows(self) -> List[_EuclideanCostRow]:
+		if self.cost_row_lists is None:
+			xs, ys = self.coords[:, 0].tolist(), self.coords[:, 1].tolist()
+			self.cost_row_lists = [_EuclideanCostRow(xs, ys, u) for u in range(len(xs))]
+		return self.cost_row_lists
+
+	def is_symmetric(self) -> bool:
+		return True
+
+	def nearest_neighbors(self, count: int) -> numpy.ndarray:
+		if count <= self.neighbors.shape[1]:
+			return self.neighbors[:, :count]
+		if count not in self.nearest_neighbors_cache:
+			self.nearest_neighbors_cache[count] = self.grid.nearest_neighbors(count, excluded = DEPOT_INDEX)
+		return self.nearest_neighbors_cache[count]
+
+	def neighbor_costs(self, count: int) -> numpy.ndarray:
+		nearest = self.nearest_neighbors(count)
+		return self.cost[numpy.arange(len(nearest))[:, numpy.newaxis], nearest]
+
+	def to_graph(self) -> DiGraph:
+		"""Graph with the nearest neighbour edges of every node and all edges from and to the depot."""
+		graph = DiGraph()
+		for i in list(range(1, len(self.nodes))) + [DEPOT_INDEX]:
+			x, y = self.coords[i].tolist()
+			graph.add_node(self.nodes[i], demand = self.demand[i].item(), x = x, y = y)
+
+		cost = self.cost_rows()
+		for u, row in enumerate(self.neighbors.tolist()):
+			for v in row:
+				graph.add_edge(self.nodes[u], self.nodes[v], cost = cost[u][v])
+				graph.add_edge(self.nodes[v], self.nodes[u], cost = cost[u][v])
+		for v in range(1, len(self.nodes)):
+			graph.add_edge(self.nodes[DEPOT_INDEX], self.nodes[v], cost = cost[DEPOT_INDEX][v])
+			graph.add_edge(self.nodes[v], self.nodes[DEPOT_INDEX], cost = cost[DEPOT_INDEX][v])
+		return graph
@@ -0,0 +1,73 @@
+from collections import deque
+from typing import List, Sequence
+
+from .compact_route import CompactRoute
+from .cvrp_matrix import DEPOT_INDEX
+from .cvrp_solver import CVRPException
+
+
+def split_giant_tour(
+		giant_tour: Sequence[int], cost: List[list], demand: List[float], truck_capacity: float,
+		truck_route_limit: float
+) -> CompactRoute:
+	"""
+	Cuts a giant tour of customers into consecutive routes, following the linear Split of Vidal (2016).
+
+	A route serving the customers i+1..j costs p[i] + c(0, t[i+1]) - D[i+1] + D[j] + c(t[j], 0), where p[i] is the
+	cost of the best split of the first i customers and D the distance travelled along the giant tour. The best
+	predecessor i of j is therefore the one with the smallest key p[i] + c(0, t[i+1]) - D[i+1] among those whose
+	route to j is feasible. The load of a route only grows when customers are appended, so the feasible
+	predecessors form a window sliding forward and a monotonic deque yields every minimum in amortized O(1).
+
+	The split is optimal when only the capacity binds. The route limit is only handled exactly if route lengths
+	grow with every customer appended, which the triangle inequality guarantees; rounded costs such as those of
+	TSPLIB instances may break it by 1, and a predecessor dropped for the route limit is then never reconsidered.
+	The routes returned are always feasible, but may occasionally cost slightly more than the best split.
+	"""
+	tour = [DEPOT_INDEX] + list(giant_tour)
+	n = len(tour) - 1
+
+	distance = [0.0] * (n + 1)
+	load = [0.0] * (n + 1)
+	for k in range(1, n + 1):
+		load[k] = load[k - 1] + demand[tour[k]]
+		if k > 1:
+			distance[k] = distance[k - 1] + cost[tour[k - 1]][tour[k]]
+
+	# starts[i] + D[j] + c(t[j], 0) is the length of the route i+1..j, keys[i] adds the cost p[i] of reaching i.
+	potential = [0.0] * (n + 1)
+	predecessor = [0] * (n + 1)
+	starts = [0.0] * (n + 1)
+	keys = [0.0] * (n + 1)
+	starts[0] = keys[0] = cost[DEPOT_INDEX][tour[1]] if n else 0.0
+	candidates = deque([0])
+
+	for j in range(1, n + 1):
+		to_depot = cost[tour[j]][DEPOT_INDEX]
+		while candidates and (
+				load[j] - load[candidates[0]] > truck_capacity or
+				starts[candidates[0]] + distance[j] + to_depot > truck_route_limit
+		):
+			candidates.popleft()
+		if not candidates:
+			raise CVRPException(f'Invalid problem definition: no feasible route ends at node index {tour[j]}')
+
+		i = candidates[0]
+		potential[j] = keys[i] + distance[j] + to_depot
+		predecessor[j] = i
+
+		if j < n:
+			starts[j] = cost[DEPOT_INDEX][tour[j + 1]] - distance[j + 1]
+			keys[j] = potential[j] + starts[j]
+			while candidates and keys[candidates[-1]] >= keys[j]:
+				candidates.pop()
+			candidates.append(j)
+
+	routes = []
+	j = n
+	while j > 0:
+		i = predecessor[j]
+		routes.append(tour[i + 1:j + 1])
+		j = i
+
+	return CompactRoute.from_routes(routes[::-1], potential[n])
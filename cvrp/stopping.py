@@ -0,0 +1,92 @@
+import math
+import time
+from typing import Optional
+
+from .cvrp_solver import CVRPDefinition
+
+STOP_ITERATIONS = 'iterations'
+STOP_TIME_LIMIT = 'time_limit'
+STOP_STAGNATION = 'stagnation'
+STOP_TARGET_GAP = 'target_gap'
+STOP_CANCELLED = 'cancelled'
+
+
+class SolveResult:
+	"""Summary of a finished run: why it stopped and when its best solution was found."""
+
+	def __init__(
+			self, stop_reason: str, iterations: int, elapsed: float, best_len: float, best_iteration: int,
+			best_time: float
+	):
+		self.stop_reason = stop_reason
+		self.iterations = iterations
+		self.elapsed = elapsed
+		self.best_len = best_len
+		self.best_iteration = best_iteration
+		self.best_time = best_time
+
+	def __str__(self):
+		return f'{self.best_len} after {self.iterations} it / {self.elapsed:.3f} s ' \
+			f'(best at it {self.best_iteration} / {self.best_time:.3f} s, stopped by {self.stop_reason})'
+
+
+class StoppingRule:
+	"""
+	Decides after every iteration whether a run should go on. Besides the iteration count a run can be bounded by
+	a wall-clock time limit, by the number of iterations without improvement and by the relative gap to the best
+	known solution of the problem. The time limit is enforced ahead of time: a run stops when another iteration of
+	average duration would not fit into the remaining time. A run also stops once cancel_event, any event with an
+	is_set() method such as a multiprocessing one, is set.
+	"""
+
+	def __init__(
+			self, iterations: int, time_limit: Optional[float] = None, stagnation_limit: Optional[int] = None,
+			target_gap: Optional[float] = None, cancel_event = None
+	):
+		self.iterations = iterations
+		self.time_limit = time_limit
+		self.stagnation_limit = stagnation_limit
+		self.target_gap = target_gap
+		self.cancel_event = cancel_event
+		self.start(None)
+
+	def start(self, problem: Optional[CVRPDefinition]):
+		self.start_time = time.perf_counter()
+		self.iteration = 0
+		self.elapsed = 0.0
+		self.best_len = math.inf
+		self.best_iteration = 0
+		self.best_time = 0.0
+
+		self.target_len = None
+		if self.target_gap is not None and problem is not None and problem.best_known_solution is not None:
+			self.target_len = problem.best_known_solution * (1 + self.target_gap)
+
+	def update(self, best_len: float, iterations = 1) -> Optional[str]:
+		"""Records the best length after the next iterations; the time limit assumes the next step is as long."""
+		self.iteration += iterations
+		self.elapsed = time.perf_counter() - self.start_time
+
+		if best_len < self.best_len:
+			self.best_len = best_len
+			self.best_iteration = self.iteration
+			self.best_time = self.elapsed
+
+		if self.cancel_event is not None and self.cancel_event.is_set():
+			return STOP_CANCELLED
+		if self.target_len is not None and self.best_len <= self.target_len:
+			return STOP_TARGET_GAP
+		if self.stagnation_limit is not None and self.iteration - self.best_iteration >= self.stagnation_limit:
+			return STOP_STAGNATION
+		if self.time_limit is not None and \
+				self.elapsed * (self.iteration + iterations) / self.iteration > self.time_limit:
+			return STOP_TIME_LIMIT
+		if self.iteration >= self.iterations:
+			return STOP_ITERATIONS
+		return None
+
+	def result(self, stop_reason: Optional[str]) -> SolveResult:
+		# None when not a single iteration ran: the iteration budget stopped the run before it started.
+		return SolveResult(
+			stop_reason or STOP_ITERATIONS, self.iteration, self.elapsed, self.best_len, self.best_iteration, self.best_time
+		)
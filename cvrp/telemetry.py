@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import List
+
+import numpy
+from pandas import DataFrame
+
+from .compact_route import CompactRoute
+
+TRACE_COLUMNS = (
+	'iteration_best', 'global_best', 'mean_len', 'pheromone_entropy', 'pheromone_min', 'pheromone_max',
+	'distinct_routes'
+)
+
+
+class IterationTrace:
+	"""
+	Per-iteration convergence and pheromone statistics of one run, kept in arrays allocated up front for the
+	maximum number of iterations. pheromone_entropy is the mean entropy of the outgoing pheromone distribution of
+	a node: it starts at log(n - 1) for uniform trails and drops as the colony commits to a few edges.
+	"""
+
+	def __init__(self, iterations: int):
+		self.size = 0
+		self.iteration_best = numpy.full(iterations, numpy.nan)
+		self.global_best = numpy.full(iterations, numpy.nan)
+		self.mean_len = numpy.full(iterations, numpy.nan)
+		self.pheromone_entropy = numpy.full(iterations, numpy.nan)
+		self.pheromone_min = numpy.full(iterations, numpy.nan)
+		self.pheromone_max = numpy.full(iterations, numpy.nan)
+		self.distinct_routes = numpy.zeros(iterations, dtype = numpy.int32)
+
+	def record(
+			self, routes: List[CompactRoute], global_best: float, pheromone: numpy.ndarray, neighbors: numpy.ndarray
+	):
+		i = self.size
+		if i == len(self.global_best):
+			return
+
+		lengths = numpy.fromiter((route.length for route in routes), dtype = float, count = len(routes))
+		self.iteration_best[i] = lengths.min()
+		self.global_best[i] = global_best
+		self.mean_len[i] = lengths.mean()
+		self.distinct_routes[i] = len({ route.tour.tobytes() for route in routes })
+
+		trails = numpy.where(neighbors, pheromone, 0)
+		self.pheromone_min[i] = pheromone[neighbors].min()
+		self.pheromone_max[i] = trails.max()
+
+		p = trails / trails.sum(axis = 1, keepdims = True)
+		with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+			self.pheromone_entropy[i] = -numpy.nansum(numpy.where(p > 0, p * numpy.log(p), 0)) / len(p)
+
+		self.size += 1
+
+	def to_frame(self) -> DataFrame:
+		frame = DataFrame({ column: getattr(self, column)[:self.size] for column in TRACE_COLUMNS })
+		frame.insert(0, 'iteration', numpy.arange(1, self.size + 1))
+		return frame
+
+	def to_csv(self, path: Path):
+		self.to_frame().to_csv(path, index = False)
+
+	def to_parquet(self, path: Path):
+		"""Requires pyarrow or fastparquet, which are not installed with the rest of the requirements."""
+		self.to_frame().to_parquet(path, index = False)
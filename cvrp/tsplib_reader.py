@@ -0,0 +1,79 @@
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy
+
+BEST_VALUE_PATTERN = re.compile(r'(?:Optimal|Best) value:\s*(\d+(?:\.\d+)?)', re.IGNORECASE)
+TRUCKS_PATTERN = re.compile(r'No of trucks:\s*(\d+)', re.IGNORECASE)
+
+
+class TSPLIBInstance:
+	"""CVRP instance in TSPLIB format. Arrays are ordered as in the file, depot_index points at the depot row."""
+
+	def __init__(
+			self, name: str, capacity: float, node_ids: numpy.ndarray, coords: numpy.ndarray, demand: numpy.ndarray,
+			depot_index: int, best_known_solution: Optional[float] = None, trucks: Optional[int] = None
+	):
+		self.name = name
+		self.node_ids = node_ids
+		self.capacity = capacity
+		self.coords = coords
+		self.demand = demand
+		self.depot_index = depot_index
+		self.best_known_solution = best_known_solution
+		self.trucks = trucks
+
+
+def read_tsplib(path: Path) -> TSPLIBInstance:
+	headers = { }
+	sections = { }
+	section = None
+
+	with open(path) as file:
+		for line in file:
+			line = line.strip()
+			if not line:
+				continue
+
+			keyword = line.split(':', 1)[0].strip()
+			if keyword[0].isalpha():
+				section = None
+				if keyword.endswith('_SECTION'):
+					section = sections.setdefault(keyword, [])
+				elif keyword != 'EOF':
+					headers[keyword] = line.split(':', 1)[1].strip()
+			elif section is not None:
+				section.append(line.split())
+
+	dimension = int(headers['DIMENSION'])
+
+	node_coords = numpy.array(sections['NODE_COORD_SECTION'][:dimension], dtype = float)
+	node_demands = numpy.array(sections['DEMAND_SECTION'][:dimension], dtype = float)
+	node_ids = node_coords[:, 0].astype(int)
+	if not numpy.array_equal(node_ids, node_demands[:, 0].astype(int)):
+		raise ValueError(f'{path}: node coordinates and demands are listed in different order')
+
+	depot_id = int(sections.get('DEPOT_SECTION', [['1']])[0][0])
+	comment = headers.get('COMMENT', '')
+	best_value = BEST_VALUE_PATTERN.search(comment)
+	trucks = TRUCKS_PATTERN.search(comment)
+
+	return TSPLIBInstance(
+		name = headers.get('NAME', Path(path).stem), capacity = _parse_number(headers['CAPACITY']),
+		node_ids = node_ids, coords = node_coords[:, 1:3], demand = node_demands[:, 1],
+		depot_index = int(numpy.argmax(node_ids == depot_id)),
+		best_known_solution = _parse_number(best_value.group(1)) if best_value else None,
+		trucks = int(trucks.group(1)) if trucks else None
+	)
+
+
+def _parse_number(text: str):
+	value = float(text)
+	return int(value) if value.is_integer() else value
+
+
+def euclidean_costs(coords: numpy.ndarray) -> numpy.ndarray:
+	"""Distance matrix of EUC_2D instances: Euclidean distances rounded to the nearest integer."""
+	deltas = coords[:, numpy.newaxis, :] - coords[numpy.newaxis, :, :]
+	return numpy.rint(numpy.sqrt(numpy.einsum('ijk,ijk->ij', deltas, deltas)))
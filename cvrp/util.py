@@ -1,4 +1,5 @@
 import math
+from typing import Union
 
 import networkx
 import numpy
@@ -7,8 +8,13 @@ from matplotlib import pyplot as plt
 from networkx import DiGraph
 from networkx import nx_agraph
 
+from .compact_route import CompactRoute
+
+
+def route_len(g: Union[DiGraph, CompactRoute]):
+	if isinstance(g, CompactRoute):
+		return g.length
 
-def route_len(g: DiGraph):
 	edge_costs = [e[2]['cost'] for e in g.edges(data = True)]
 	return numpy.sum(edge_costs)
 
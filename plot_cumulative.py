@@ -1,46 +1,27 @@
 import csv
+import sys
+from pathlib import Path
 
 from matplotlib import pyplot as plt
 
-from cvrp.aco_cvrp_solver import AntColonyCVRPSolver
+from cvrp.benchmark import BenchmarkConfig, read_results, summarize
 
-solvers = [
-	AntColonyCVRPSolver(iterations = 1000),
-	AntColonyCVRPSolver(iterations = 3000),
-	AntColonyCVRPSolver(iterations = 2500, permute_routes = True),
-	AntColonyCVRPSolver(iterations = 2000, candidate_fraction = 0.25),
-	AntColonyCVRPSolver(iterations = 1500, ants_per_customer = 2)
-]
-
-aco_scores = {
-	'A-n33-k5.vrp': [691.1, 687.55, 687, 695.25, 687.5],
-	'B-n41-k6.vrp': [878.4, 873.15, 870.3, 868.5, 872.65],
-	'B-n50-k8.vrp': [1368.1, 1364.7, 1361.35, 1368.4, 1366.45],
-	'A-n60-k9.vrp': [1460.5, 1455.8, 1446.15, 1453.5, 1456.2],
-	'A-n69-k9.vrp': [1269.2, 1261.85, 1260.25, 1258.7, 1263.4],
-	'A-n80-k10.vrp': [1939.95, 1927.25, 1922.25, 1919.1, 1921.45]
-}
-
-greedy_scores = {
-	'A-n33-k5.vrp': 829,
-	'B-n41-k6.vrp': 1184,
-	'B-n50-k8.vrp': 1622,
-	'A-n60-k9.vrp': 1676,
-	'A-n69-k9.vrp': 1386,
-	'A-n80-k10.vrp': 1988
-}
+CONFIG_PATH = Path('benchmark.json')
+RESULTS_PATH = Path('out/benchmark.jsonl')
+BASELINE_SOLVER = 'Greedy'
 
 if __name__ == '__main__':
-	percent_scores = { }
+	results = read_results(Path(sys.argv[1]) if len(sys.argv) > 1 else RESULTS_PATH)
+	config = BenchmarkConfig.from_file(Path(sys.argv[2]) if len(sys.argv) > 2 else CONFIG_PATH)
+	summary = summarize(config.select_results(results))
 
-	for instance in aco_scores.keys():
-		scores = aco_scores[instance]
-		percent_scores[instance] = [score / greedy_scores[instance] for score in scores]
+	baseline = summary[summary['solver_desc'] == BASELINE_SOLVER].set_index('instance')['rlen_avg']
+	aco_summary = summary[summary['solver_desc'] != BASELINE_SOLVER].copy()
+	aco_summary['percent_score'] = aco_summary['rlen_avg'] / aco_summary['instance'].map(baseline)
 
-	avg_percent_scores = []
-	for i in range(len(solvers)):
-		avg_solver_score = sum([ps[i] for ps in percent_scores.values()]) / len(percent_scores.keys())
-		avg_percent_scores.append(avg_solver_score)
+	scores = aco_summary.groupby(['solver_index', 'solver_desc'])['percent_score'].mean().reset_index()
+	solver_descs = scores['solver_desc'].tolist()
+	avg_percent_scores = scores['percent_score'].tolist()
 
 	score_min = min(avg_percent_scores)
 	score_max = max(avg_percent_scores)
@@ -49,8 +30,8 @@ if __name__ == '__main__':
 	plt.ylim(y_min, y_max)
 
 	plt.bar(
-		x = range(len(solvers)), height = avg_percent_scores,
-		tick_label = [solver.get_info() for solver in solvers]
+		x = range(len(solver_descs)), height = avg_percent_scores,
+		tick_label = solver_descs
 	)
 	plt.xticks(rotation = 30, ha = 'right')
 	plt.ylabel('Stosunek długości znalezionej trasy do $L_{AZ}$')
@@ -61,6 +42,6 @@ if __name__ == '__main__':
 		csv_writer = csv.writer(file)
 		csv_writer.writerow(['Algorytm', 'Sredni wynik'])
 
-		for solver, score in list(zip(solvers, avg_percent_scores)):
-			row = [solver.get_info(), score]
+		for solver_desc, score in list(zip(solver_descs, avg_percent_scores)):
+			row = [solver_desc, score]
 			csv_writer.writerow(row)